@@ -1,23 +1,35 @@
 """
 TTS后端模块
+
+各后端模块按需导入：只使用某一个后端时，不会加载其他后端的依赖
 """
 
 import sys
 sys.dont_write_bytecode = True
 
 from .base import TTSBackendBase, TTSBackendRegistry, TTSResult
-from .ai_voice import AIVoiceBackend
-from .gsv2p import GSV2PBackend
-from .gpt_sovits import GPTSoVITSBackend
-from .doubao import DoubaoBackend
-from .cosyvoice import CosyVoiceBackend
-
-# 注册后端
-TTSBackendRegistry.register("ai_voice", AIVoiceBackend)
-TTSBackendRegistry.register("gsv2p", GSV2PBackend)
-TTSBackendRegistry.register("gpt_sovits", GPTSoVITSBackend)
-TTSBackendRegistry.register("doubao", DoubaoBackend)
-TTSBackendRegistry.register("cosyvoice", CosyVoiceBackend)
+
+# 后端类名 -> (后端名称, 模块路径)
+_LAZY_BACKENDS = {
+    "AIVoiceBackend": ("ai_voice", ".ai_voice"),
+    "GSV2PBackend": ("gsv2p", ".gsv2p"),
+    "GPTSoVITSBackend": ("gpt_sovits", ".gpt_sovits"),
+    "DoubaoBackend": ("doubao", ".doubao"),
+    "CosyVoiceBackend": ("cosyvoice", ".cosyvoice"),
+}
+
+# 注册后端（延迟导入，首次创建时加载模块）
+for _class_name, (_backend_name, _module_path) in _LAZY_BACKENDS.items():
+    TTSBackendRegistry.register_lazy(_backend_name, _module_path, _class_name)
+
+
+def __getattr__(name: str):
+    """按需导入后端类（PEP 562）"""
+    if name in _LAZY_BACKENDS:
+        backend_name, _ = _LAZY_BACKENDS[name]
+        return TTSBackendRegistry.get(backend_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "TTSBackendBase",
@@ -3,7 +3,7 @@ AI Voice 后端实现
 使用 MaiCore 内置的 AI 语音功能
 """
 
-from typing import Optional, Callable, Dict
+from typing import Optional, Callable, Dict, Tuple, ClassVar
 from .base import TTSBackendBase, TTSResult
 from ..utils.text import TTSTextUtils
 from ..config_keys import ConfigKeys
@@ -11,6 +11,9 @@ from src.common.logger import get_logger
 
 logger = get_logger("tts_ai_voice")
 
+# AI Voice 内部音色ID前缀
+AI_VOICE_ID_PREFIX = "lucy-voice-"
+
 # AI Voice 音色映射表
 AI_VOICE_ALIAS_MAP = {
     "小新": "lucy-voice-laibixiaoxin",
@@ -51,6 +54,11 @@ class AIVoiceBackend(TTSBackendBase):
     support_private_chat = False  # 不支持私聊
     default_audio_format = ""  # AI Voice不需要音频格式
 
+    # 类变量：缓存规范化后的音色查找表 (别名表快照, 默认音色, 查找表, 兜底音色)
+    # 后端实例按请求创建，因此缓存放在类上；别名表内容或默认音色变化时重建
+    # 快照按内容比较而非对象身份，配置字典被原地修改时同样能失效
+    _alias_cache: ClassVar[Optional[Tuple[Tuple[Tuple[str, str], ...], str, Dict[str, str], str]]] = None
+
     def __init__(self, config_getter, log_prefix: str = ""):
         super().__init__(config_getter, log_prefix)
         self._send_command = None  # 由外部注入
@@ -63,19 +71,44 @@ class AIVoiceBackend(TTSBackendBase):
         """获取默认音色"""
         return self.get_config(ConfigKeys.AI_VOICE_DEFAULT_CHARACTER, "温柔妹妹")
 
-    def resolve_voice(self, voice: Optional[str]) -> str:
-        """解析音色别名"""
+    def _get_alias_table(self) -> Tuple[Dict[str, str], str]:
+        """
+        获取规范化的音色查找表和兜底音色（带缓存）
+
+        Returns:
+            (查找表, 兜底音色ID)
+        """
         alias_map: Dict[str, str] = self.get_config(
             ConfigKeys.AI_VOICE_ALIAS_MAP,
             AI_VOICE_ALIAS_MAP
         )
         default_voice = self.get_default_voice()
-        return TTSTextUtils.resolve_voice_alias(
-            voice,
-            alias_map,
-            default_voice,
-            prefix="lucy-voice-"
-        )
+
+        snapshot = tuple(alias_map.items())
+        cache = AIVoiceBackend._alias_cache
+        if cache is not None and cache[0] == snapshot and cache[1] == default_voice:
+            return cache[2], cache[3]
+
+        table = TTSTextUtils.build_voice_alias_table(alias_map)
+        fallback = table.get(TTSTextUtils.normalize_voice_key(default_voice), default_voice)
+        AIVoiceBackend._alias_cache = (snapshot, default_voice, table, fallback)
+        return table, fallback
+
+    def resolve_voice(self, voice: Optional[str]) -> str:
+        """解析音色别名"""
+        table, fallback = self._get_alias_table()
+        if not voice:
+            return fallback
+
+        resolved = table.get(TTSTextUtils.normalize_voice_key(voice))
+        if resolved:
+            return resolved
+
+        # 未收录的内部ID格式，直接返回
+        if voice.startswith(AI_VOICE_ID_PREFIX):
+            return voice
+
+        return fallback
 
     async def execute(
         self,
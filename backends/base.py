@@ -3,11 +3,17 @@ TTS后端抽象基类和注册表
 """
 
 import asyncio
+import hashlib
+import importlib
+import logging
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, Type, Optional, Any, Callable, Tuple, Union
+from types import MappingProxyType
+from typing import Dict, Type, Optional, Any, Awaitable, Callable, Tuple, Union, ClassVar, Mapping
 from src.common.logger import get_logger
 from ..config_keys import ConfigKeys
+from ..utils.file import TTSFileManager, AUDIO_READ_CHUNK_SIZE, AUDIO_HEADER_PROBE_SIZE
 
 logger = get_logger("tts_backend")
 
@@ -25,6 +31,80 @@ class TTSResult:
         return iter((self.success, self.message))
 
 
+# 音频缓存默认内存上限（字节）
+DEFAULT_AUDIO_CACHE_MAX_BYTES = 64 << 20
+
+# 单条音频超过内存上限的该比例分之一时不缓存，避免个别长音频挤掉大量短句
+AUDIO_CACHE_ITEM_DIVISOR = 8
+
+
+class _AudioLRU:
+    """
+    合成音频的 LRU 缓存
+
+    聊天场景中"好的"、"晚安"等短句高频重复，命中时可跳过整个远端合成请求；
+    同时限制条目数和音频总字节数，WAV 等大音频不会让缓存无限占用内存
+
+    条目为音频数据（bytes），或文件路径模式下已发送的音频文件路径（str，不占内存，不计入字节数）
+    """
+
+    def __init__(self, max_size: int = 128, max_bytes: int = DEFAULT_AUDIO_CACHE_MAX_BYTES):
+        self._data: "OrderedDict[bytes, Union[bytes, str]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._total_bytes = 0  # 当前缓存的音频总字节数
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def _weight(value: Union[bytes, str]) -> int:
+        """条目占用的内存字节数（文件路径不计）"""
+        return len(value) if isinstance(value, bytes) else 0
+
+    async def get(self, key: bytes) -> Optional[Union[bytes, str]]:
+        """获取缓存的音频或音频文件路径，命中时移到队尾"""
+        async with self._lock:
+            audio_data = self._data.get(key)
+            if audio_data is not None:
+                self._data.move_to_end(key)
+            return audio_data
+
+    async def put(self, key: bytes, value: Union[bytes, str]) -> None:
+        """写入缓存，超出条数或字节上限时淘汰最久未使用的条目，过大的音频不缓存"""
+        weight = self._weight(value)
+        async with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._total_bytes -= self._weight(old)
+
+            if weight > self.max_bytes // AUDIO_CACHE_ITEM_DIVISOR:
+                return
+
+            self._data[key] = value
+            self._total_bytes += weight
+            while len(self._data) > self.max_size or self._total_bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._total_bytes -= self._weight(evicted)
+
+    def resize(self, max_size: int, max_bytes: int) -> None:
+        """调整条数和字节上限（缩小时在下次写入时淘汰）"""
+        self.max_size = max(0, max_size)
+        self.max_bytes = max(0, max_bytes)
+
+
+# 全局音频缓存（所有后端共享，键中包含后端名称）
+_audio_cache = _AudioLRU()
+
+
+class _InflightRequest:
+    """进行中的合成请求：共享的请求任务及当前等待它的调用方数量"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
 class TTSBackendBase(ABC):
     """
     TTS后端抽象基类
@@ -44,6 +124,17 @@ class TTSBackendBase(ABC):
     # 默认音频格式
     default_audio_format: str = "mp3"
 
+    # 最大并发请求数的配置键和默认值（子类可覆盖）
+    max_concurrency_key: str = ConfigKeys.GENERAL_MAX_CONCURRENCY
+    default_max_concurrency: int = 3
+
+    # 类变量：按后端名称共享的并发信号量 {backend_name: (上限, 信号量)}
+    # 后端实例按请求创建，信号量必须跨实例共享才能起到限流作用
+    _semaphores: ClassVar[Dict[str, Tuple[int, asyncio.Semaphore]]] = {}
+
+    # 类变量：进行中的合成请求 {缓存键: _InflightRequest}，相同请求并发到达时只向远端发送一次
+    _inflight: ClassVar[Dict[bytes, _InflightRequest]] = {}
+
     def __init__(self, config_getter: Callable[[str, Any], Any], log_prefix: str = ""):
         """
         初始化后端
@@ -60,6 +151,162 @@ class TTSBackendBase(ABC):
         """设置发送自定义消息的函数"""
         self._send_custom = send_custom_func
 
+    def _audio_cache_key(self, *parts: Any) -> bytes:
+        """
+        生成音频缓存键
+
+        Args:
+            *parts: 影响合成结果的参数（文本、音色、情感、格式等）
+
+        Returns:
+            缓存键
+        """
+        raw = "|".join([self.backend_name, *(str(p) for p in parts)])
+        return hashlib.md5(raw.encode("utf-8")).digest()
+
+    def _audio_cache_enabled(self) -> bool:
+        """根据配置同步缓存容量，返回缓存是否启用"""
+        cache_size = self.get_config(ConfigKeys.GENERAL_TTS_CACHE_SIZE, 128)
+        max_bytes = self.get_config(ConfigKeys.GENERAL_TTS_CACHE_MAX_BYTES, DEFAULT_AUDIO_CACHE_MAX_BYTES)
+        try:
+            cache_size = int(cache_size)
+        except (TypeError, ValueError):
+            cache_size = 128
+        try:
+            max_bytes = int(max_bytes)
+        except (TypeError, ValueError):
+            max_bytes = DEFAULT_AUDIO_CACHE_MAX_BYTES
+        _audio_cache.resize(cache_size, max_bytes)
+        return cache_size > 0 and max_bytes > 0
+
+    async def _get_cached_audio(self, key: bytes) -> Optional[bytes]:
+        """查询音频缓存，未启用或未命中时返回None"""
+        if not self._audio_cache_enabled():
+            return None
+        audio_data = await _audio_cache.get(key)
+        if not isinstance(audio_data, bytes):
+            # 文件路径条目由 _send_cached_audio_file 处理
+            return None
+        logger.info(f"{self.log_prefix} 命中音频缓存 (大小: {len(audio_data)}字节)，跳过合成请求")
+        return audio_data
+
+    async def _put_cached_audio(self, key: bytes, audio_data: bytes) -> None:
+        """写入音频缓存"""
+        if self._audio_cache_enabled():
+            await _audio_cache.put(key, audio_data)
+
+    async def _put_cached_audio_file(self, key: bytes, audio_path: str) -> None:
+        """
+        记录已验证的音频文件路径（文件路径发送模式使用）
+
+        只缓存路径，不把文件读回内存
+        """
+        if self._audio_cache_enabled():
+            await _audio_cache.put(key, audio_path)
+
+    async def _send_cached_audio_file(
+        self,
+        key: bytes,
+        audio_format: str,
+        prefix: str,
+        voice_info: str,
+        output_dir: str
+    ) -> Optional[TTSResult]:
+        """
+        文件路径模式下查询缓存的音频文件，命中时为其创建新的临时路径并发送
+
+        缓存的文件发送后会被延迟清理，命中时把缓存指向新文件，
+        持续被请求的音频一直有效；文件已被清理时视为未命中
+
+        Args:
+            key: 音频缓存键
+            audio_format: 音频格式
+            prefix: 临时文件名前缀
+            voice_info: 音色信息（用于日志）
+            output_dir: 音频输出目录
+
+        Returns:
+            命中时返回发送结果，未命中返回None
+        """
+        if not self._audio_cache_enabled():
+            return None
+        cached_path = await _audio_cache.get(key)
+        if not isinstance(cached_path, str):
+            return None
+
+        audio_path = TTSFileManager.generate_temp_path(
+            prefix=prefix,
+            suffix=f".{audio_format}",
+            output_dir=output_dir
+        )
+        if not await TTSFileManager.link_file_async(cached_path, audio_path):
+            return None
+
+        logger.info(f"{self.log_prefix} 命中音频缓存 (文件: {cached_path})，跳过合成请求")
+        await _audio_cache.put(key, audio_path)
+        return await self.send_audio_from_path(audio_path, voice_info)
+
+    async def _coalesce(self, key: bytes, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        合并进行中的相同请求
+
+        已有相同键的请求在进行时直接等待其结果，不再重复请求远端
+
+        Args:
+            key: 请求键（通常为音频缓存键）
+            factory: 实际发起请求的协程工厂
+
+        Returns:
+            factory 的返回值（多个调用方共享，不应被修改）
+        """
+        inflight = TTSBackendBase._inflight
+        entry = inflight.get(key)
+        if entry is None:
+            # 请求在独立任务中执行，不依附于首个调用方：首个调用方被取消时其余调用方照常获得结果
+            entry = _InflightRequest(asyncio.ensure_future(factory()))
+            inflight[key] = entry
+
+            def _remove(_task: "asyncio.Future[Any]", entry: _InflightRequest = entry) -> None:
+                if inflight.get(key) is entry:
+                    del inflight[key]
+
+            entry.task.add_done_callback(_remove)
+        else:
+            logger.info(f"{self.log_prefix} 相同内容的合成请求正在进行，等待其结果")
+
+        task = entry.task
+        entry.waiters += 1
+        try:
+            # shield：单个调用方被取消只结束自己的等待，不取消共享的请求
+            return await asyncio.shield(task)
+        finally:
+            entry.waiters -= 1
+            # 所有调用方都已离开时请求结果无人使用，取消请求本身
+            if entry.waiters == 0 and not task.done():
+                task.cancel()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        获取当前后端共享的并发信号量
+
+        超出上限的请求排队等待，避免突发流量压垮远端服务；
+        配置的上限变化时重建信号量
+
+        Returns:
+            asyncio.Semaphore
+        """
+        limit = self.get_config(self.max_concurrency_key, self.default_max_concurrency)
+        try:
+            limit = max(1, int(limit))
+        except (TypeError, ValueError):
+            limit = self.default_max_concurrency
+
+        entry = TTSBackendBase._semaphores.get(self.backend_name)
+        if entry is None or entry[0] != limit:
+            entry = (limit, asyncio.Semaphore(limit))
+            TTSBackendBase._semaphores[self.backend_name] = entry
+        return entry[1]
+
     async def send_audio(
         self,
         audio_data: bytes,
@@ -79,19 +326,20 @@ class TTSBackendBase(ABC):
         Returns:
             TTSResult
         """
-        from ..utils.file import TTSFileManager
-
         # 检查是否使用base64发送
         use_base64 = self.get_config(ConfigKeys.GENERAL_USE_BASE64_AUDIO, False)
-        logger.debug(f"{self.log_prefix} 开始发送音频 (原始大小: {len(audio_data)}字节, 格式: {audio_format})")
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug(f"{self.log_prefix} 开始发送音频 (原始大小: {len(audio_data)}字节, 格式: {audio_format})")
 
         if use_base64:
             # 使用base64编码发送
-            base64_audio = TTSFileManager.audio_to_base64(audio_data)
+            base64_audio = TTSFileManager.audio_to_base64(memoryview(audio_data))
             if not base64_audio:
                 return TTSResult(False, "音频数据转base64失败", backend_name=self.backend_name)
 
-            logger.debug(f"{self.log_prefix} base64编码完成，准备通过send_custom发送")
+            if debug_enabled:
+                logger.debug(f"{self.log_prefix} base64编码完成，准备通过send_custom发送")
             if self._send_custom:
                 await self._send_custom(message_type="voice", content=base64_audio)
                 logger.info(f"{self.log_prefix} 语音已通过send_custom发送 (base64模式, 音频大小: {len(audio_data)}字节)")
@@ -116,23 +364,100 @@ class TTSBackendBase(ABC):
             if not await TTSFileManager.write_audio_async(audio_path, audio_data):
                 return TTSResult(False, "保存音频文件失败", backend_name=self.backend_name)
 
-            logger.debug(f"{self.log_prefix} 音频文件已保存, 路径: {audio_path}")
-            # 发送语音
-            if self._send_custom:
-                await self._send_custom(message_type="voiceurl", content=audio_path)
-                logger.info(f"{self.log_prefix} 语音已通过send_custom发送 (文件路径模式, 路径: {audio_path})")
-                # 延迟清理临时文件
-                asyncio.create_task(TTSFileManager.cleanup_file_async(audio_path, delay=30))
-            else:
-                logger.warning(f"{self.log_prefix} send_custom未设置，无法发送语音")
-                return TTSResult(False, "send_custom回调未设置", backend_name=self.backend_name)
+            if debug_enabled:
+                logger.debug(f"{self.log_prefix} 音频文件已保存, 路径: {audio_path}")
+            return await self.send_audio_from_path(audio_path, voice_info)
 
-            return TTSResult(
-                success=True,
-                message=f"成功发送{self.backend_name}语音{(' ('+voice_info+')') if voice_info else ''}",
-                audio_path=audio_path,
-                backend_name=self.backend_name
-            )
+    @staticmethod
+    async def _read_error_body(response, limit: int = 8192) -> bytes:
+        """
+        读取错误响应的开头部分
+
+        错误信息只需前若干字节，不必下载完整响应体
+
+        Args:
+            response: aiohttp 响应对象
+            limit: 最多读取的字节数
+
+        Returns:
+            响应体开头（最多 limit 字节）
+        """
+        chunks = []
+        remaining = limit
+        while remaining > 0:
+            chunk = await response.content.read(remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    async def _read_audio_response(self, response) -> Tuple[Optional[bytes], str]:
+        """
+        分块读取 HTTP 音频响应
+
+        收到足够的开头字节后立即检查是否为音频，不是则放弃读取剩余数据
+
+        Args:
+            response: aiohttp 响应对象（状态码已确认为 200）
+
+        Returns:
+            (音频数据或None, 错误信息)
+        """
+        chunks = []
+        received = 0
+        head_checked = False
+        async for chunk in response.content.iter_chunked(AUDIO_READ_CHUNK_SIZE):
+            chunks.append(chunk)
+            received += len(chunk)
+            if not head_checked and received >= AUDIO_HEADER_PROBE_SIZE:
+                head_checked = True
+                # 只拼接凑够探测长度所需的字节，不复制整个最新数据块
+                if len(chunks) == 1:
+                    head = chunk[:AUDIO_HEADER_PROBE_SIZE]
+                else:
+                    head = b"".join(chunks[:-1]) + chunk[:AUDIO_HEADER_PROBE_SIZE]
+                is_valid, error_msg = TTSFileManager.validate_audio_header(head[:AUDIO_HEADER_PROBE_SIZE])
+                if not is_valid:
+                    logger.warning(f"{self.log_prefix} {error_msg}: {b''.join(chunks)[:64]!r}")
+                    return None, error_msg
+
+        audio_data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        if not head_checked:
+            is_valid, error_msg = TTSFileManager.validate_audio_header(audio_data)
+            if not is_valid:
+                return None, error_msg
+        return audio_data, ""
+
+    async def send_audio_from_path(self, audio_path: str, voice_info: str = "") -> TTSResult:
+        """
+        以文件路径模式发送已落盘的音频文件
+
+        供直接把音频写到目标路径的后端使用，省去一次内存中的完整拷贝
+
+        Args:
+            audio_path: 音频文件路径（发送后延迟清理）
+            voice_info: 音色信息（用于日志）
+
+        Returns:
+            TTSResult
+        """
+        # 发送语音
+        if self._send_custom:
+            await self._send_custom(message_type="voiceurl", content=audio_path)
+            logger.info(f"{self.log_prefix} 语音已通过send_custom发送 (文件路径模式, 路径: {audio_path})")
+            # 延迟清理临时文件
+            asyncio.create_task(TTSFileManager.cleanup_file_async(audio_path, delay=30))
+        else:
+            logger.warning(f"{self.log_prefix} send_custom未设置，无法发送语音")
+            return TTSResult(False, "send_custom回调未设置", backend_name=self.backend_name)
+
+        return TTSResult(
+            success=True,
+            message=f"成功发送{self.backend_name}语音{(' ('+voice_info+')') if voice_info else ''}",
+            audio_path=audio_path,
+            backend_name=self.backend_name
+        )
 
     @abstractmethod
     async def execute(
@@ -182,6 +507,18 @@ class TTSBackendRegistry:
 
     _backends: Dict[str, Type[TTSBackendBase]] = {}
 
+    # 延迟注册的后端 {后端名称: (模块路径, 类名)}，首次使用时才导入模块
+    _lazy_backends: Mapping[str, Tuple[str, str]] = {}
+
+    # 冻结后不再接受注册/注销，延迟注册表变为只读
+    _frozen: bool = False
+
+    @classmethod
+    def _check_not_frozen(cls) -> None:
+        """冻结后禁止修改注册表"""
+        if cls._frozen:
+            raise RuntimeError("TTSBackendRegistry 已冻结，无法再修改后端注册")
+
     @classmethod
     def register(cls, name: str, backend_class: Type[TTSBackendBase]) -> None:
         """
@@ -191,19 +528,56 @@ class TTSBackendRegistry:
             name: 后端名称
             backend_class: 后端类
         """
+        cls._check_not_frozen()
         cls._backends[name] = backend_class
-        logger.debug(f"注册TTS后端: {name}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"注册TTS后端: {name}")
+
+    @classmethod
+    def register_lazy(cls, name: str, module_path: str, class_name: str) -> None:
+        """
+        延迟注册后端（首次 get/create 时才导入模块）
+
+        Args:
+            name: 后端名称
+            module_path: 模块路径（相对路径基于本包）
+            class_name: 后端类名
+        """
+        cls._check_not_frozen()
+        cls._lazy_backends[name] = (module_path, class_name)
 
     @classmethod
     def unregister(cls, name: str) -> None:
         """注销后端"""
+        cls._check_not_frozen()
         if name in cls._backends:
             del cls._backends[name]
+        cls._lazy_backends.pop(name, None)
+
+    @classmethod
+    def freeze(cls) -> None:
+        """
+        冻结注册表（插件加载完成后调用，可重复调用）
+
+        冻结后注册表不再变化，延迟注册表替换为只读映射；
+        延迟后端在首次使用时仍会正常加载
+        """
+        if cls._frozen:
+            return
+        cls._lazy_backends = MappingProxyType(dict(cls._lazy_backends))
+        cls._frozen = True
 
     @classmethod
     def get(cls, name: str) -> Optional[Type[TTSBackendBase]]:
-        """获取后端类"""
-        return cls._backends.get(name)
+        """获取后端类（延迟注册的后端在此时导入）"""
+        backend_class = cls._backends.get(name)
+        if backend_class is None and name in cls._lazy_backends:
+            module_path, class_name = cls._lazy_backends[name]
+            module = importlib.import_module(module_path, __package__)
+            backend_class = getattr(module, class_name)
+            # 加载结果直接写入缓存，不走 register（冻结后也需要能加载）
+            cls._backends[name] = backend_class
+        return backend_class
 
     @classmethod
     def create(
@@ -231,9 +605,9 @@ class TTSBackendRegistry:
     @classmethod
     def list_backends(cls) -> list[str]:
         """列出所有已注册的后端名称"""
-        return list(cls._backends.keys())
+        return list(dict.fromkeys([*cls._backends, *cls._lazy_backends]))
 
     @classmethod
     def is_registered(cls, name: str) -> bool:
         """检查后端是否已注册"""
-        return name in cls._backends
+        return name in cls._backends or name in cls._lazy_backends
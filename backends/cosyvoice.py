@@ -4,55 +4,68 @@ CosyVoice后端实现
 """
 
 import asyncio
+import logging
 import os
 import shutil
-from typing import Optional, Tuple
+import sys
+from types import MappingProxyType
+from typing import Optional, Tuple, Any, ClassVar
 from .base import TTSBackendBase, TTSResult
 from ..utils.file import TTSFileManager
+from ..utils.text import TTSTextUtils
 from ..config_keys import ConfigKeys
 from src.common.logger import get_logger
 
 logger = get_logger("tts_cosyvoice")
 
+try:
+    # httpx 随 gradio_client 一起安装，用于识别连接/协议层异常
+    import httpx as _httpx
+    _CONNECTION_ERRORS: Tuple[type, ...] = (ConnectionError, _httpx.NetworkError, _httpx.ProtocolError)
+except ImportError:  # pragma: no cover - 可选依赖
+    _CONNECTION_ERRORS = (ConnectionError,)
+
+# 其他异常（如 Gradio AppError）连续出现达到该次数时也重建客户端，
+# 服务端重启后缓存的接口描述可能已失效
+_CLIENT_FAILURE_THRESHOLD = 3
+
+# CosyVoice指令模板
+_INSTRUCT_TEMPLATE = "You are a helpful assistant. {}<|endofprompt|>"
+
+# 支持的方言（指令统一为"请用XX话表达。"）
+_COSYVOICE_DIALECTS = (
+    "广东", "东北", "甘肃", "贵州", "河南", "湖北", "湖南", "江西", "闽南",
+    "宁夏", "山西", "陕西", "山东", "上海", "四川", "天津", "云南",
+)
+
 # CosyVoice指令映射表（方言、情感、语速等）
-COSYVOICE_INSTRUCT_MAP = {
+_COSYVOICE_INSTRUCT_ITEMS = {
     # 方言
-    "广东话": "You are a helpful assistant. 请用广东话表达。<|endofprompt|>",
-    "东北话": "You are a helpful assistant. 请用东北话表达。<|endofprompt|>",
-    "甘肃话": "You are a helpful assistant. 请用甘肃话表达。<|endofprompt|>",
-    "贵州话": "You are a helpful assistant. 请用贵州话表达。<|endofprompt|>",
-    "河南话": "You are a helpful assistant. 请用河南话表达。<|endofprompt|>",
-    "湖北话": "You are a helpful assistant. 请用湖北话表达。<|endofprompt|>",
-    "湖南话": "You are a helpful assistant. 请用湖南话表达。<|endofprompt|>",
-    "江西话": "You are a helpful assistant. 请用江西话表达。<|endofprompt|>",
-    "闽南话": "You are a helpful assistant. 请用闽南话表达。<|endofprompt|>",
-    "宁夏话": "You are a helpful assistant. 请用宁夏话表达。<|endofprompt|>",
-    "山西话": "You are a helpful assistant. 请用山西话表达。<|endofprompt|>",
-    "陕西话": "You are a helpful assistant. 请用陕西话表达。<|endofprompt|>",
-    "山东话": "You are a helpful assistant. 请用山东话表达。<|endofprompt|>",
-    "上海话": "You are a helpful assistant. 请用上海话表达。<|endofprompt|>",
-    "四川话": "You are a helpful assistant. 请用四川话表达。<|endofprompt|>",
-    "天津话": "You are a helpful assistant. 请用天津话表达。<|endofprompt|>",
-    "云南话": "You are a helpful assistant. 请用云南话表达。<|endofprompt|>",
+    **{f"{d}话": _INSTRUCT_TEMPLATE.format(f"请用{d}话表达。") for d in _COSYVOICE_DIALECTS},
 
     # 音量
-    "大声": "You are a helpful assistant. Please say a sentence as loudly as possible.<|endofprompt|>",
-    "小声": "You are a helpful assistant. Please say a sentence in a very soft voice.<|endofprompt|>",
+    "大声": _INSTRUCT_TEMPLATE.format("Please say a sentence as loudly as possible."),
+    "小声": _INSTRUCT_TEMPLATE.format("Please say a sentence in a very soft voice."),
 
     # 语速
-    "慢速": "You are a helpful assistant. 请用尽可能慢地语速说一句话。<|endofprompt|>",
-    "快速": "You are a helpful assistant. 请用尽可能快地语速说一句话。<|endofprompt|>",
+    "慢速": _INSTRUCT_TEMPLATE.format("请用尽可能慢地语速说一句话。"),
+    "快速": _INSTRUCT_TEMPLATE.format("请用尽可能快地语速说一句话。"),
 
     # 情感
-    "开心": "You are a helpful assistant. 请非常开心地说一句话。<|endofprompt|>",
-    "伤心": "You are a helpful assistant. 请非常伤心地说一句话。<|endofprompt|>",
-    "生气": "You are a helpful assistant. 请非常生气地说一句话。<|endofprompt|>",
+    "开心": _INSTRUCT_TEMPLATE.format("请非常开心地说一句话。"),
+    "伤心": _INSTRUCT_TEMPLATE.format("请非常伤心地说一句话。"),
+    "生气": _INSTRUCT_TEMPLATE.format("请非常生气地说一句话。"),
 
     # 特殊风格
-    "小猪佩奇": "You are a helpful assistant. 我想体验一下小猪佩奇风格，可以吗？<|endofprompt|>",
-    "机器人": "You are a helpful assistant. 你可以尝试用机器人的方式解答吗？<|endofprompt|>",
+    "小猪佩奇": _INSTRUCT_TEMPLATE.format("我想体验一下小猪佩奇风格，可以吗？"),
+    "机器人": _INSTRUCT_TEMPLATE.format("你可以尝试用机器人的方式解答吗？"),
 }
 
+# 只读映射，键已驻留（intern），查询时可走字符串身份比较的快速路径
+COSYVOICE_INSTRUCT_MAP = MappingProxyType(
+    {sys.intern(k): sys.intern(v) for k, v in _COSYVOICE_INSTRUCT_ITEMS.items()}
+)
+
 
 class CosyVoiceBackend(TTSBackendBase):
     """
@@ -66,6 +79,18 @@ class CosyVoiceBackend(TTSBackendBase):
     backend_description = "阿里云 CosyVoice3 API (ModelScope Gradio)"
     support_private_chat = True
     default_audio_format = "wav"
+    max_concurrency_key = ConfigKeys.COSYVOICE_MAX_CONCURRENCY
+    default_max_concurrency = 1
+
+    # 类变量：复用 Gradio 客户端，避免每次请求重新拉取接口描述
+    _client: ClassVar[Any] = None
+    _client_key: ClassVar[Optional[Tuple[str, int]]] = None
+    _client_lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+    # 连续推理失败次数，成功时清零
+    _client_failures: ClassVar[int] = 0
+
+    # 类变量：参考音频路径解析结果 (配置值, 实际使用的路径)，配置不变时免去 stat 系统调用
+    _ref_audio_cache: ClassVar[Optional[Tuple[str, str]]] = None
 
     def get_default_voice(self) -> str:
         """获取默认音色（CosyVoice 不需要预设音色）"""
@@ -90,8 +115,9 @@ class CosyVoiceBackend(TTSBackendBase):
         Returns:
             指令文本
         """
-        if emotion and emotion in COSYVOICE_INSTRUCT_MAP:
-            return COSYVOICE_INSTRUCT_MAP[emotion]
+        instruct = COSYVOICE_INSTRUCT_MAP.get(sys.intern(emotion)) if emotion else None
+        if instruct:
+            return instruct
 
         # 返回默认指令（确保不为空）
         default_instruct = self.get_config(
@@ -105,6 +131,156 @@ class CosyVoiceBackend(TTSBackendBase):
 
         return default_instruct
 
+    def _create_client(self, gradio_url: str, timeout: int) -> Any:
+        """
+        创建 Gradio 客户端（同步，会请求接口描述，需在线程中调用）
+
+        Args:
+            gradio_url: Gradio API地址
+            timeout: 超时时间
+
+        Returns:
+            gradio_client.Client 实例
+        """
+        from gradio_client import Client
+
+        # 创建 Gradio 客户端（设置超时）
+        try:
+            import httpx
+            httpx_kwargs = {"timeout": httpx.Timeout(timeout, read=timeout, write=timeout, connect=30.0)}
+            return Client(gradio_url, httpx_kwargs=httpx_kwargs)
+        except Exception as e:
+            logger.warning(f"{self.log_prefix} 无法设置 httpx 超时，使用默认配置: {e}")
+            return Client(gradio_url)
+
+    async def _get_client(self, gradio_url: str, timeout: int) -> Any:
+        """
+        获取复用的 Gradio 客户端，地址或超时变化时重建
+
+        Args:
+            gradio_url: Gradio API地址
+            timeout: 超时时间
+
+        Returns:
+            gradio_client.Client 实例
+        """
+        key = (gradio_url, timeout)
+        if CosyVoiceBackend._client is not None and CosyVoiceBackend._client_key == key:
+            return CosyVoiceBackend._client
+
+        async with CosyVoiceBackend._client_lock:
+            # 双重检查：等待锁期间可能已被其他请求创建
+            if CosyVoiceBackend._client is None or CosyVoiceBackend._client_key != key:
+                logger.debug(f"{self.log_prefix} 创建 Gradio 客户端: {gradio_url}")
+                CosyVoiceBackend._client = await asyncio.to_thread(self._create_client, gradio_url, timeout)
+                CosyVoiceBackend._client_key = key
+            return CosyVoiceBackend._client
+
+    @classmethod
+    def _invalidate_client(cls) -> None:
+        """丢弃缓存的客户端，下次请求时重建"""
+        cls._client = None
+        cls._client_key = None
+        cls._client_failures = 0
+
+    def _record_client_failure(self, error: Exception) -> None:
+        """
+        记录一次推理失败，仅在连接/协议异常或连续失败达到阈值时丢弃客户端
+
+        Args:
+            error: 推理抛出的异常
+        """
+        CosyVoiceBackend._client_failures += 1
+        failures = CosyVoiceBackend._client_failures
+        if isinstance(error, _CONNECTION_ERRORS) or failures >= _CLIENT_FAILURE_THRESHOLD:
+            logger.warning(f"{self.log_prefix} 丢弃 Gradio 客户端 (连续失败 {failures} 次): {error}")
+            self._invalidate_client()
+
+    @staticmethod
+    def _read_file_sync(path: str) -> bytes:
+        """同步读取文件（内部方法）"""
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _get_reference_audio(self) -> str:
+        """
+        获取参考音频路径
+
+        配置的参考音频不存在时回退到插件目录下的 test.wav；
+        解析结果按配置值缓存，仅在配置变化时重新检查文件
+
+        Returns:
+            存在的参考音频路径，均不存在时返回空字符串
+        """
+        reference_audio = self.get_config(ConfigKeys.COSYVOICE_REFERENCE_AUDIO, "")
+        cached = CosyVoiceBackend._ref_audio_cache
+        if cached is not None and cached[0] == reference_audio:
+            return cached[1]
+
+        resolved = reference_audio if reference_audio and os.path.exists(reference_audio) else ""
+
+        # CosyVoice 的"自然语言控制"模式实际上需要参考音频和 prompt_text
+        # 如果没有配置，使用默认的参考音频
+        if not resolved:
+            plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            default_audio = os.path.join(plugin_dir, "test.wav")
+            if os.path.exists(default_audio):
+                resolved = default_audio
+                logger.debug(f"{self.log_prefix} 使用默认参考音频: {resolved}")
+
+        CosyVoiceBackend._ref_audio_cache = (reference_audio, resolved)
+        return resolved
+
+    async def _send_result_file(
+        self,
+        result_path: str,
+        audio_format: str,
+        voice_info: str,
+        cache_key: bytes
+    ) -> TTSResult:
+        """
+        以文件路径模式发送 Gradio 生成的音频文件
+
+        结果文件由 gradio_client 管理，复制而不是移动，
+        shutil.copyfile 在 Linux 下使用 sendfile，数据不经过 Python 堆
+
+        Args:
+            result_path: Gradio 返回的音频文件路径
+            audio_format: 音频格式
+            voice_info: 音色信息（用于日志）
+            cache_key: 音频缓存键，验证通过后缓存文件路径
+
+        Returns:
+            TTSResult
+        """
+        output_dir = self.get_config(ConfigKeys.GENERAL_AUDIO_OUTPUT_DIR, "")
+        audio_path = TTSFileManager.generate_temp_path(
+            prefix="tts_cosyvoice",
+            suffix=f".{audio_format}",
+            output_dir=output_dir
+        )
+
+        try:
+            await asyncio.to_thread(shutil.copyfile, result_path, audio_path)
+            file_size = await asyncio.to_thread(os.path.getsize, audio_path)
+        except OSError as e:
+            logger.error(f"{self.log_prefix} 复制音频文件失败: {e}")
+            await TTSFileManager.cleanup_file_async(audio_path)
+            return TTSResult(False, f"保存音频文件失败: {e}", backend_name=self.backend_name)
+
+        is_valid, error_msg = TTSFileManager.validate_audio_size(file_size)
+        if not is_valid:
+            logger.warning(f"{self.log_prefix} CosyVoice音频数据验证失败: {error_msg}")
+            await TTSFileManager.cleanup_file_async(audio_path)
+            return TTSResult(False, f"CosyVoice语音{error_msg}", backend_name=self.backend_name)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{self.log_prefix} CosyVoice音频文件已保存 (大小: {file_size}字节, 路径: {audio_path})")
+
+        # 缓存文件路径（不读回内存），后续相同请求为其创建新路径后直接发送
+        await self._put_cached_audio_file(cache_key, audio_path)
+        return await self.send_audio_from_path(audio_path, voice_info)
+
     async def execute(
         self,
         text: str,
@@ -123,14 +299,21 @@ class CosyVoiceBackend(TTSBackendBase):
         Returns:
             TTSResult
         """
+        # 调试日志开关（关闭时跳过 f-string 格式化）
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
         # 验证配置
         is_valid, error_msg = self.validate_config()
         if not is_valid:
             return TTSResult(False, error_msg, backend_name=self.backend_name)
 
-        # 验证文本
-        if not text or not text.strip():
+        # 验证并规范化文本（超出上限的部分截断）
+        max_text_length = self.get_config(ConfigKeys.COSYVOICE_MAX_TEXT_LENGTH, 2000)
+        text, truncated = TTSTextUtils.prepare_text(text, max_text_length)
+        if not text:
             return TTSResult(False, "待合成的文本为空", backend_name=self.backend_name)
+        if truncated:
+            logger.warning(f"{self.log_prefix} 文本超出长度上限，已截断至{max_text_length}字符")
 
         # 获取配置
         gradio_url = self.get_config(ConfigKeys.COSYVOICE_GRADIO_URL, "")
@@ -144,39 +327,55 @@ class CosyVoiceBackend(TTSBackendBase):
             mode_str = mode_config if mode_config else "3s极速复刻"
 
         timeout = self.get_config(ConfigKeys.COSYVOICE_TIMEOUT, 60)
-        reference_audio = self.get_config(ConfigKeys.COSYVOICE_REFERENCE_AUDIO, "")
+        reference_audio = self._get_reference_audio()
         prompt_text = self.get_config(ConfigKeys.COSYVOICE_PROMPT_TEXT, "")
 
-        # CosyVoice 的"自然语言控制"模式实际上需要参考音频和 prompt_text
-        # 如果没有配置，使用默认的参考音频
-        if not reference_audio or not os.path.exists(reference_audio):
-            plugin_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            default_audio = os.path.join(plugin_dir, "test.wav")
-            if os.path.exists(default_audio):
-                reference_audio = default_audio
-                logger.debug(f"{self.log_prefix} 使用默认参考音频: {reference_audio}")
-
         # 如果没有 prompt_text，使用默认文本
         if not prompt_text:
             prompt_text = "大家好，我是嘉然，今天我来为大家朗读。"
-            logger.debug(f"{self.log_prefix} 使用默认 prompt_text")
+            if debug_enabled:
+                logger.debug(f"{self.log_prefix} 使用默认 prompt_text")
 
-        # voice 参数可以覆盖配置文件中的参考音频
+        # voice 参数可以覆盖配置文件中的参考音频（用户传入，每次检查）
         if voice and os.path.exists(voice):
             reference_audio = voice
 
         # 解析指令文本
         instruct_text = self._resolve_instruct(emotion)
-
-        logger.info(
-            f"{self.log_prefix} CosyVoice请求: text='{text[:50]}...' "
-            f"(共{len(text)}字符), mode={mode_str}, instruct={emotion or '默认'}"
-        )
+        audio_format = self.get_config(ConfigKeys.COSYVOICE_AUDIO_FORMAT, "wav")
+        voice_info = f"模式: {mode_str}, 指令: {emotion or '默认'}"
 
         try:
+            # 相同文本和合成参数的结果直接复用缓存
+            cache_key = self._audio_cache_key(
+                text, mode_str, prompt_text, reference_audio, instruct_text, audio_format
+            )
+            cached_audio = await self._get_cached_audio(cache_key)
+            if cached_audio is not None:
+                return await self.send_audio(
+                    audio_data=cached_audio,
+                    audio_format=audio_format,
+                    prefix="tts_cosyvoice",
+                    voice_info=voice_info
+                )
+            # 文件路径模式缓存的是上次发送的音频文件
+            use_base64 = self.get_config(ConfigKeys.GENERAL_USE_BASE64_AUDIO, False)
+            if not use_base64:
+                cached_result = await self._send_cached_audio_file(
+                    cache_key, audio_format, "tts_cosyvoice", voice_info,
+                    self.get_config(ConfigKeys.GENERAL_AUDIO_OUTPUT_DIR, "")
+                )
+                if cached_result is not None:
+                    return cached_result
+
+            logger.info(
+                f"{self.log_prefix} CosyVoice请求: text='{text[:50]}...' "
+                f"(共{len(text)}字符), mode={mode_str}, instruct={emotion or '默认'}"
+            )
+
             # 动态导入 gradio_client（避免全局依赖）
             try:
-                from gradio_client import Client, handle_file
+                from gradio_client import handle_file
             except ImportError:
                 logger.error(f"{self.log_prefix} gradio_client 未安装，请运行: pip install gradio_client")
                 return TTSResult(
@@ -185,41 +384,52 @@ class CosyVoiceBackend(TTSBackendBase):
                     backend_name=self.backend_name
                 )
 
-            # 创建 Gradio 客户端（设置超时）
+            client = await self._get_client(gradio_url, timeout)
+
+            async def generate() -> Any:
+                # 准备参数
+                if debug_enabled:
+                    logger.debug(f"{self.log_prefix} 准备参考音频: {reference_audio}")
+                prompt_wav_upload = handle_file(reference_audio) if reference_audio else None
+                if debug_enabled:
+                    logger.debug(f"{self.log_prefix} 参考音频准备完成")
+
+                # 调用 API
+                logger.info(f"{self.log_prefix} 调用 Gradio API: {gradio_url} (超时: {timeout}秒)")
+                if debug_enabled:
+                    logger.debug(f"{self.log_prefix} mode参数: {mode_str} (type: {type(mode_str).__name__})")
+                    logger.debug(f"{self.log_prefix} prompt_text: {prompt_text[:50]}...")
+                    logger.debug(f"{self.log_prefix} instruct_text: {instruct_text[:50]}...")
+
+                # 限制并发：排队等待不计入请求超时
+                async with self._get_semaphore():
+                    result = await asyncio.wait_for(
+                        asyncio.to_thread(
+                            client.predict,
+                            tts_text=text,
+                            mode_checkbox_group=mode_str,
+                            prompt_text=prompt_text,
+                            prompt_wav_upload=prompt_wav_upload,
+                            prompt_wav_record=None,
+                            instruct_text=instruct_text,
+                            seed=0,
+                            stream=False,  # API 实际期望布尔值 False，虽然文档显示为 Literal['False']
+                            api_name="/generate_audio"
+                        ),
+                        timeout=timeout
+                    )
+                return result
+
+            # 相同请求并发到达时共享同一次 Gradio 推理（结果文件只读，各请求分别复制/读取）
             try:
-                import httpx
-                httpx_kwargs = {"timeout": httpx.Timeout(timeout, read=timeout, write=timeout, connect=30.0)}
-                client = Client(gradio_url, httpx_kwargs=httpx_kwargs)
+                result = await self._coalesce(cache_key, generate)
+            except asyncio.TimeoutError:
+                raise
             except Exception as e:
-                logger.warning(f"{self.log_prefix} 无法设置 httpx 超时，使用默认配置: {e}")
-                client = Client(gradio_url)
-
-            # 准备参数
-            logger.debug(f"{self.log_prefix} 准备参考音频: {reference_audio}")
-            prompt_wav_upload = handle_file(reference_audio) if reference_audio and os.path.exists(reference_audio) else None
-            logger.debug(f"{self.log_prefix} 参考音频准备完成")
-
-            # 调用 API
-            logger.info(f"{self.log_prefix} 调用 Gradio API: {gradio_url} (超时: {timeout}秒)")
-            logger.debug(f"{self.log_prefix} mode参数: {mode_str} (type: {type(mode_str).__name__})")
-            logger.debug(f"{self.log_prefix} prompt_text: {prompt_text[:50]}...")
-            logger.debug(f"{self.log_prefix} instruct_text: {instruct_text[:50]}...")
-
-            result = await asyncio.wait_for(
-                asyncio.to_thread(
-                    client.predict,
-                    tts_text=text,
-                    mode_checkbox_group=mode_str,
-                    prompt_text=prompt_text,
-                    prompt_wav_upload=prompt_wav_upload,
-                    prompt_wav_record=None,
-                    instruct_text=instruct_text,
-                    seed=0,
-                    stream=False,  # API 实际期望布尔值 False，虽然文档显示为 Literal['False']
-                    api_name="/generate_audio"
-                ),
-                timeout=timeout
-            )
+                # 只统计推理本身的失败，发送/校验异常与客户端状态无关
+                self._record_client_failure(e)
+                raise
+            CosyVoiceBackend._client_failures = 0
 
             logger.info(f"{self.log_prefix} CosyVoice API 响应成功")
 
@@ -231,10 +441,13 @@ class CosyVoiceBackend(TTSBackendBase):
                     backend_name=self.backend_name
                 )
 
-            # 读取音频数据
+            # 文件路径模式：直接复制结果文件（Linux 下走 sendfile 零拷贝），不经过内存
+            if not use_base64:
+                return await self._send_result_file(result, audio_format, voice_info, cache_key)
+
+            # 读取音频数据（在线程中进行，避免大文件读取阻塞事件循环）
             try:
-                with open(result, 'rb') as f:
-                    audio_data = f.read()
+                audio_data = await asyncio.to_thread(self._read_file_sync, result)
             except Exception as e:
                 logger.error(f"{self.log_prefix} 读取音频文件失败: {e}")
                 return TTSResult(
@@ -253,15 +466,14 @@ class CosyVoiceBackend(TTSBackendBase):
                     backend_name=self.backend_name
                 )
 
-            logger.debug(
-                f"{self.log_prefix} CosyVoice音频数据验证通过 "
-                f"(大小: {len(audio_data)}字节)"
-            )
+            if debug_enabled:
+                logger.debug(
+                    f"{self.log_prefix} CosyVoice音频数据验证通过 "
+                    f"(大小: {len(audio_data)}字节)"
+                )
+            await self._put_cached_audio(cache_key, audio_data)
 
             # 使用统一的发送方法
-            audio_format = self.get_config(ConfigKeys.COSYVOICE_AUDIO_FORMAT, "wav")
-            voice_info = f"模式: {mode_str}, 指令: {emotion or '默认'}"
-
             return await self.send_audio(
                 audio_data=audio_data,
                 audio_format=audio_format,
@@ -278,6 +490,8 @@ class CosyVoiceBackend(TTSBackendBase):
             )
         except Exception as e:
             logger.error(f"{self.log_prefix} CosyVoice 执行异常: {e}")
+            # 参考音频可能已被移动或删除，下次请求重新检查
+            CosyVoiceBackend._ref_audio_cache = None
             return TTSResult(
                 False,
                 f"CosyVoice 执行错误: {e}",
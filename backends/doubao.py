@@ -4,11 +4,17 @@
 """
 
 import asyncio
-import uuid
-from typing import Optional, List, Dict, Tuple
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional, List, Dict, Tuple, Any, ClassVar, BinaryIO
 from .base import TTSBackendBase, TTSResult
 from .doubao_stream_parser import DoubaoStreamParser
 from ..utils.file import TTSFileManager
+from ..utils.json_utils import TTSJsonUtils
+from ..utils.text import TTSTextUtils
 from ..utils.session import TTSSessionManager
 from ..config_keys import ConfigKeys
 from src.common.logger import get_logger
@@ -16,7 +22,7 @@ from src.common.logger import get_logger
 logger = get_logger("tts_doubao")
 
 # 豆包语音情感映射表（用于自动生成context_texts）
-DOUBAO_EMOTION_MAP = {
+_DOUBAO_EMOTION_ITEMS = {
     # 积极情绪
     "开心": "你的语气再欢乐一点",
     "兴奋": "用特别兴奋激动的语气说话",
@@ -45,6 +51,31 @@ DOUBAO_EMOTION_MAP = {
     "大声": "大声一点",
 }
 
+# 只读映射，键已驻留（intern），查询时可走字符串身份比较的快速路径
+DOUBAO_EMOTION_MAP = MappingProxyType(
+    {sys.intern(k): v for k, v in _DOUBAO_EMOTION_ITEMS.items()}
+)
+
+
+@dataclass(frozen=True)
+class _DoubaoConfig:
+    """豆包后端配置快照（每次合成只读取一次配置）"""
+    api_url: str
+    app_id: str
+    access_key: str
+    resource_id: str
+    default_voice: str
+    timeout: int
+    audio_format: str
+    sample_rate: int
+    bitrate: int
+    speed: Optional[float]
+    volume: Optional[float]
+    context_texts: Optional[List[str]]
+    max_text_length: int
+    use_base64: bool
+    output_dir: str
+
 
 class DoubaoBackend(TTSBackendBase):
     """
@@ -59,17 +90,45 @@ class DoubaoBackend(TTSBackendBase):
     support_private_chat = True
     default_audio_format = "mp3"
 
+    # 类变量：请求体中与文本无关的固定部分 (配置元组, req_params骨架)
+    # 配置变化时重建；骨架本身只读，每次请求浅拷贝后填入文本和音色
+    _req_skeleton: ClassVar[Optional[Tuple[Tuple[Any, ...], Dict[str, Any]]]] = None
+
+    # 实例级配置快照（见 cfg 属性）
+    _cfg: Optional[_DoubaoConfig] = None
+
+    @property
+    def cfg(self) -> _DoubaoConfig:
+        """配置快照（实例按请求创建，首次访问时读取全部配置）"""
+        if self._cfg is None:
+            get = self.get_config
+            self._cfg = _DoubaoConfig(
+                api_url=get(ConfigKeys.DOUBAO_API_URL, "https://openspeech.bytedance.com/api/v3/tts/unidirectional"),
+                app_id=get(ConfigKeys.DOUBAO_APP_ID, ""),
+                access_key=get(ConfigKeys.DOUBAO_ACCESS_KEY, ""),
+                resource_id=get(ConfigKeys.DOUBAO_RESOURCE_ID, ""),
+                default_voice=get(ConfigKeys.DOUBAO_DEFAULT_VOICE, "zh_female_shuangkuaisisi_moon_bigtts"),
+                timeout=get(ConfigKeys.DOUBAO_TIMEOUT, 30),
+                audio_format=get(ConfigKeys.DOUBAO_AUDIO_FORMAT, "mp3"),
+                sample_rate=get(ConfigKeys.DOUBAO_SAMPLE_RATE, 24000),
+                bitrate=get(ConfigKeys.DOUBAO_BITRATE, 128000),
+                speed=get(ConfigKeys.DOUBAO_SPEED, None),
+                volume=get(ConfigKeys.DOUBAO_VOLUME, None),
+                context_texts=get(ConfigKeys.DOUBAO_CONTEXT_TEXTS, None),
+                max_text_length=get(ConfigKeys.DOUBAO_MAX_TEXT_LENGTH, 1024),
+                use_base64=get(ConfigKeys.GENERAL_USE_BASE64_AUDIO, False),
+                output_dir=get(ConfigKeys.GENERAL_AUDIO_OUTPUT_DIR, ""),
+            )
+        return self._cfg
+
     def get_default_voice(self) -> str:
         """获取默认音色"""
-        return self.get_config(ConfigKeys.DOUBAO_DEFAULT_VOICE, "zh_female_shuangkuaisisi_moon_bigtts")
+        return self.cfg.default_voice
 
     def validate_config(self) -> Tuple[bool, str]:
         """验证配置"""
-        app_id = self.get_config(ConfigKeys.DOUBAO_APP_ID, "")
-        access_key = self.get_config(ConfigKeys.DOUBAO_ACCESS_KEY, "")
-        resource_id = self.get_config(ConfigKeys.DOUBAO_RESOURCE_ID, "")
-
-        if not app_id or not access_key or not resource_id:
+        cfg = self.cfg
+        if not cfg.app_id or not cfg.access_key or not cfg.resource_id:
             return False, "豆包语音后端缺少必需的认证配置（app_id/access_key/resource_id）"
 
         return True, ""
@@ -84,9 +143,191 @@ class DoubaoBackend(TTSBackendBase):
         Returns:
             context_texts 列表或 None
         """
-        if emotion and emotion in DOUBAO_EMOTION_MAP:
-            return [DOUBAO_EMOTION_MAP[emotion]]
-        return None
+        context_text = DOUBAO_EMOTION_MAP.get(sys.intern(emotion)) if emotion else None
+        return [context_text] if context_text else None
+
+    def _get_req_skeleton(self) -> Dict[str, Any]:
+        """
+        获取请求参数骨架（audio_params/speed/volume）
+
+        Returns:
+            req_params 骨架（只读，调用方需浅拷贝后再修改）
+        """
+        cfg = self.cfg
+        config = (cfg.audio_format, cfg.sample_rate, cfg.bitrate, cfg.speed, cfg.volume)
+        cached = DoubaoBackend._req_skeleton
+        if cached is not None and cached[0] == config:
+            return cached[1]
+
+        audio_format, sample_rate, bitrate, speed, volume = config
+        skeleton: Dict[str, Any] = {
+            "audio_params": {
+                "format": audio_format,
+                "sample_rate": sample_rate,
+                "bitrate": bitrate
+            }
+        }
+
+        # 添加可选参数
+        if speed is not None:
+            skeleton["speed"] = speed
+        if volume is not None:
+            skeleton["volume"] = volume
+
+        DoubaoBackend._req_skeleton = (config, skeleton)
+        return skeleton
+
+    async def _request_audio(
+        self,
+        api_url: str,
+        request_data: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: int
+    ) -> Tuple[Optional[bytes], str]:
+        """
+        发送单次API请求并解析流式响应
+
+        Returns:
+            (音频数据或None, 错误信息)
+        """
+        session_manager = await TTSSessionManager.get_instance()
+        async with session_manager.post(
+            api_url,
+            data=TTSJsonUtils.dumps(request_data),
+            headers=headers,
+            backend_name="doubao",
+            timeout=timeout
+        ) as response:
+            logger.info(f"{self.log_prefix} 豆包API响应状态码: {response.status}")
+
+            if response.status == 200:
+                # 使用新的流式响应解析器
+                audio_data, error_msg = await DoubaoStreamParser.parse_response(
+                    response,
+                    log_prefix=self.log_prefix
+                )
+
+                if error_msg:
+                    logger.error(f"{self.log_prefix} 豆包语音解析失败: {error_msg}")
+                    return None, error_msg
+
+                return audio_data, ""
+            else:
+                error_text = (await self._read_error_body(response, 1024)).decode('utf-8', errors='replace')
+                logger.error(f"{self.log_prefix} 豆包API请求失败[{response.status}]: {error_text[:200]}")
+                return None, f"豆包语音API调用失败: {response.status} - {error_text[:100]}"
+
+    async def _request_audio_to_file(
+        self,
+        api_url: str,
+        request_data: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: int,
+        open_task: "asyncio.Future[BinaryIO]"
+    ) -> Tuple[int, str]:
+        """
+        发送单次API请求，并将音频流式写入文件
+
+        Args:
+            open_task: 与请求并行打开输出文件的任务
+
+        Returns:
+            (文件大小, 错误信息)
+        """
+        session_manager = await TTSSessionManager.get_instance()
+        async with session_manager.post(
+            api_url,
+            data=TTSJsonUtils.dumps(request_data),
+            headers=headers,
+            backend_name="doubao",
+            timeout=timeout
+        ) as response:
+            logger.info(f"{self.log_prefix} 豆包API响应状态码: {response.status}")
+
+            if response.status == 200:
+                # 文件在等待响应期间已打开；shield 避免取消时泄漏打开中的文件
+                output_file = await asyncio.shield(open_task)
+                file_size, error_msg = await DoubaoStreamParser.parse_response_to_file(
+                    response,
+                    output_file,
+                    log_prefix=self.log_prefix
+                )
+
+                if error_msg:
+                    logger.error(f"{self.log_prefix} 豆包语音解析失败: {error_msg}")
+                    return 0, error_msg
+
+                return file_size, ""
+            else:
+                error_text = (await self._read_error_body(response, 1024)).decode('utf-8', errors='replace')
+                logger.error(f"{self.log_prefix} 豆包API请求失败[{response.status}]: {error_text[:200]}")
+                return 0, f"豆包语音API调用失败: {response.status} - {error_text[:100]}"
+
+    @staticmethod
+    async def _close_output_file(open_task: "asyncio.Future[BinaryIO]") -> None:
+        """等待输出文件打开完成并关闭（打开失败时忽略）"""
+        try:
+            output_file = await open_task
+        except Exception:
+            return
+        await asyncio.to_thread(output_file.close)
+
+    async def _execute_to_file(
+        self,
+        api_url: str,
+        request_data: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: int,
+        audio_format: str,
+        voice_info: str,
+        cache_key: bytes
+    ) -> TTSResult:
+        """
+        文件路径发送模式：响应边接收边落盘，避免音频在内存和文件中各存一份
+
+        Args:
+            cache_key: 音频缓存键，验证通过后缓存文件路径
+
+        Returns:
+            TTSResult
+        """
+        audio_path = TTSFileManager.generate_temp_path(
+            prefix="tts_doubao",
+            suffix=f".{audio_format}",
+            output_dir=self.cfg.output_dir
+        )
+
+        # 打开文件与发送请求并行进行，响应到达时文件通常已就绪
+        open_task = asyncio.ensure_future(
+            asyncio.to_thread(DoubaoStreamParser.open_output_file, audio_path)
+        )
+        try:
+            async with self._get_semaphore():
+                file_size, error_msg = await self._request_audio_to_file(
+                    api_url, request_data, headers, timeout, open_task
+                )
+        except BaseException:
+            await self._close_output_file(open_task)
+            await TTSFileManager.cleanup_file_async(audio_path)
+            raise
+        await self._close_output_file(open_task)
+
+        if not error_msg:
+            is_valid, error_msg = TTSFileManager.validate_audio_size(file_size)
+            if not is_valid:
+                logger.warning(f"{self.log_prefix} 豆包音频数据验证失败: {error_msg}")
+                error_msg = f"豆包语音{error_msg}"
+
+        if error_msg:
+            await TTSFileManager.cleanup_file_async(audio_path)
+            return TTSResult(False, error_msg, backend_name=self.backend_name)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{self.log_prefix} 豆包音频数据验证通过 (大小: {file_size}字节)")
+
+        # 缓存文件路径（不读回内存），后续相同请求为其创建新路径后直接发送
+        await self._put_cached_audio_file(cache_key, audio_path)
+        return await self.send_audio_from_path(audio_path, voice_info)
 
     async def execute(
         self,
@@ -111,16 +352,18 @@ class DoubaoBackend(TTSBackendBase):
         if not is_valid:
             return TTSResult(False, error_msg, backend_name=self.backend_name)
 
-        # 验证文本
-        if not text or not text.strip():
-            return TTSResult(False, "待合成的文本为空", backend_name=self.backend_name)
-
         # 获取配置
-        api_url = self.get_config(ConfigKeys.DOUBAO_API_URL, "https://openspeech.bytedance.com/api/v3/tts/unidirectional")
-        app_id = self.get_config(ConfigKeys.DOUBAO_APP_ID, "")
-        access_key = self.get_config(ConfigKeys.DOUBAO_ACCESS_KEY, "")
-        resource_id = self.get_config(ConfigKeys.DOUBAO_RESOURCE_ID, "")
-        timeout = self.get_config(ConfigKeys.DOUBAO_TIMEOUT, 30)
+        cfg = self.cfg
+
+        # 验证并规范化文本（超出API上限的部分截断，避免请求被拒绝）
+        text, truncated = TTSTextUtils.prepare_text(text, cfg.max_text_length)
+        if not text:
+            return TTSResult(False, "待合成的文本为空", backend_name=self.backend_name)
+        if truncated:
+            logger.warning(f"{self.log_prefix} 文本超出长度上限，已截断至{cfg.max_text_length}字符")
+        api_url = cfg.api_url
+        timeout = cfg.timeout
+        audio_format = cfg.audio_format
 
         if not voice:
             voice = self.get_default_voice()
@@ -128,33 +371,20 @@ class DoubaoBackend(TTSBackendBase):
         # 构建请求头
         headers = {
             "Content-Type": "application/json",
-            "X-Api-App-Id": app_id,
-            "X-Api-Access-Key": access_key,
-            "X-Api-Resource-Id": resource_id,
-            "X-Api-Request-Id": str(uuid.uuid4())
+            "X-Api-App-Id": cfg.app_id,
+            "X-Api-Access-Key": cfg.access_key,
+            "X-Api-Resource-Id": cfg.resource_id,
+            # 仅用作请求关联ID，无需RFC4122格式
+            "X-Api-Request-Id": os.urandom(16).hex()
         }
 
-        # 构建请求体
-        request_data: Dict[str, any] = {
-            "req_params": {
-                "text": text,
-                "speaker": voice,
-                "audio_params": {
-                    "format": self.get_config(ConfigKeys.DOUBAO_AUDIO_FORMAT, "mp3"),
-                    "sample_rate": self.get_config(ConfigKeys.DOUBAO_SAMPLE_RATE, 24000),
-                    "bitrate": self.get_config(ConfigKeys.DOUBAO_BITRATE, 128000)
-                }
-            }
+        # 构建请求体（固定部分复用缓存的骨架）
+        req_params: Dict[str, Any] = {
+            **self._get_req_skeleton(),
+            "text": text,
+            "speaker": voice
         }
-
-        # 添加可选参数
-        speed = self.get_config(ConfigKeys.DOUBAO_SPEED, None)
-        if speed is not None:
-            request_data["req_params"]["speed"] = speed
-
-        volume = self.get_config(ConfigKeys.DOUBAO_VOLUME, None)
-        if volume is not None:
-            request_data["req_params"]["volume"] = volume
+        request_data: Dict[str, Any] = {"req_params": req_params}
 
         # 处理 context_texts
         context_texts: Optional[List[str]] = None
@@ -167,59 +397,68 @@ class DoubaoBackend(TTSBackendBase):
 
         # 否则使用配置文件的默认值
         if not context_texts:
-            context_texts = self.get_config(ConfigKeys.DOUBAO_CONTEXT_TEXTS, None)
+            context_texts = cfg.context_texts
 
         if context_texts:
-            request_data["req_params"]["context_texts"] = context_texts
-
-        logger.info(f"{self.log_prefix} 豆包语音请求: text='{text[:50]}...' (共{len(text)}字符), voice={voice}")
+            req_params["context_texts"] = context_texts
 
         try:
-            session_manager = await TTSSessionManager.get_instance()
-            async with session_manager.post(
-                api_url,
-                json=request_data,
-                headers=headers,
-                backend_name="doubao",
-                timeout=timeout
-            ) as response:
-                logger.info(f"{self.log_prefix} 豆包API响应状态码: {response.status}")
-
-                if response.status == 200:
-                    # 使用新的流式响应解析器
-                    audio_data, error_msg = await DoubaoStreamParser.parse_response(
-                        response,
-                        log_prefix=self.log_prefix
+            # 相同文本/音色/语气的结果直接复用缓存（请求参数已包含全部影响因素）
+            cache_key = self._audio_cache_key(req_params)
+            cached_audio = await self._get_cached_audio(cache_key)
+            if cached_audio is not None:
+                return await self.send_audio(
+                    audio_data=cached_audio,
+                    audio_format=audio_format,
+                    prefix="tts_doubao",
+                    voice_info=f"音色: {voice}"
+                )
+            # 文件路径模式缓存的是上次发送的音频文件
+            if not cfg.use_base64:
+                cached_result = await self._send_cached_audio_file(
+                    cache_key, audio_format, "tts_doubao", f"音色: {voice}", cfg.output_dir
+                )
+                if cached_result is not None:
+                    return cached_result
+
+            logger.info(f"{self.log_prefix} 豆包语音请求: text='{text[:50]}...' (共{len(text)}字符), voice={voice}")
+
+            # 文件路径模式直接流式落盘（每个请求写各自的文件，不参与请求合并，验证通过后回填缓存）
+            if not cfg.use_base64:
+                return await self._execute_to_file(
+                    api_url, request_data, headers, timeout, audio_format, f"音色: {voice}", cache_key
+                )
+
+            async def fetch() -> Tuple[Optional[bytes], str]:
+                # 限制并发：超出上限的请求排队，避免突发流量拖垮远端
+                async with self._get_semaphore():
+                    return await self._request_audio(
+                        api_url, request_data, headers, timeout
                     )
 
-                    if error_msg:
-                        logger.error(f"{self.log_prefix} 豆包语音解析失败: {error_msg}")
-                        return TTSResult(False, error_msg, backend_name=self.backend_name)
-
-                    # 验证音频数据
-                    is_valid, error_msg = TTSFileManager.validate_audio_data(audio_data)
-                    if not is_valid:
-                        logger.warning(f"{self.log_prefix} 豆包音频数据验证失败: {error_msg}")
-                        return TTSResult(False, f"豆包语音{error_msg}", backend_name=self.backend_name)
-
-                    logger.debug(f"{self.log_prefix} 豆包音频数据验证通过 (大小: {len(audio_data)}字节)")
-
-                    # 使用统一的发送方法
-                    audio_format = self.get_config(ConfigKeys.DOUBAO_AUDIO_FORMAT, "mp3")
-                    return await self.send_audio(
-                        audio_data=audio_data,
-                        audio_format=audio_format,
-                        prefix="tts_doubao",
-                        voice_info=f"音色: {voice}"
-                    )
-                else:
-                    error_text = await response.text()
-                    logger.error(f"{self.log_prefix} 豆包API请求失败[{response.status}]: {error_text[:200]}")
-                    return TTSResult(
-                        False,
-                        f"豆包语音API调用失败: {response.status} - {error_text[:100]}",
-                        backend_name=self.backend_name
-                    )
+            # 相同请求并发到达时共享同一次API调用
+            audio_data, error_msg = await self._coalesce(cache_key, fetch)
+
+            if error_msg:
+                return TTSResult(False, error_msg, backend_name=self.backend_name)
+
+            # 验证音频数据
+            is_valid, error_msg = TTSFileManager.validate_audio_data(audio_data)
+            if not is_valid:
+                logger.warning(f"{self.log_prefix} 豆包音频数据验证失败: {error_msg}")
+                return TTSResult(False, f"豆包语音{error_msg}", backend_name=self.backend_name)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"{self.log_prefix} 豆包音频数据验证通过 (大小: {len(audio_data)}字节)")
+            await self._put_cached_audio(cache_key, audio_data)
+
+            # 使用统一的发送方法
+            return await self.send_audio(
+                audio_data=audio_data,
+                audio_format=audio_format,
+                prefix="tts_doubao",
+                voice_info=f"音色: {voice}"
+            )
 
         except asyncio.TimeoutError:
             logger.error(f"{self.log_prefix} 豆包API请求超时 (配置超时: {timeout}秒)")
@@ -8,13 +8,39 @@
 - code>0: 错误响应
 """
 
+import asyncio
 import json
-import base64
-from typing import Tuple, Optional, List
+import logging
+import struct
+from typing import Tuple, Optional, BinaryIO
 from src.common.logger import get_logger
+from ..utils.json_utils import TTSJsonUtils
+
+# 解码/解析函数在导入时选定并绑定为模块级引用，热路径上不再做属性查找
+try:
+    # 可选依赖：SIMD 加速的 base64 解码（接口与标准库一致）
+    from pybase64 import b64decode as _b64decode
+except ImportError:  # pragma: no cover - 可选依赖
+    from base64 import b64decode as _b64decode
+
+# orjson / 标准库 json 的选择已在 TTSJsonUtils 导入时完成
+_json_loads = TTSJsonUtils.loads
 
 logger = get_logger("doubao_stream_parser")
 
+# 最小有效音频块大小（过小的块可能是损坏或无效的）
+MIN_CHUNK_SIZE = 50
+
+# 流式写文件时的写缓冲大小，也是批量写入的阈值：攒够后在线程中写入一次
+STREAM_WRITE_BUFFER_SIZE = 1 << 16
+
+# WAV 块头：块ID + 块大小（均为小端 uint32），块ID按整数比较
+_WAV_CHUNK_HEADER = struct.Struct('<II')
+_WAV_DATA_ID = struct.unpack('<I', b'data')[0]
+_WAV_RIFF_ID = struct.unpack('<I', b'RIFF')[0]
+# WAV header 大小字段（小端 uint32）
+_UINT32_LE = struct.Struct('<I')
+
 
 class DoubaoStreamParser:
     """
@@ -28,28 +54,60 @@ class DoubaoStreamParser:
     4. 记录日志（code=0 且有 "sentence" 字段）
     """
 
-    def __init__(self, log_prefix: str = "[DoubaoParser]"):
+    def __init__(self, log_prefix: str = "[DoubaoParser]", output_file: Optional[BinaryIO] = None):
         """
         初始化解析器
 
         Args:
             log_prefix: 日志前缀
+            output_file: 流式输出文件（提供时音频分批写入文件，内存中只保留未写出的一批）
         """
         self.log_prefix = log_prefix
-        self._audio_chunks: List[bytes] = []
-        self._buffer: bytes = b''
+        # 调试日志开关（每帧都会经过的日志在关闭时跳过格式化）
+        self._dbg: bool = logger.isEnabledFor(logging.DEBUG)
+        self._chunk_count: int = 0  # 已接收的音频块数
+        self._output: Optional[BinaryIO] = output_file
+        # 音频数据：header 与音频数据按到达顺序写入同一缓冲
+        # 内存模式下结束时原地回填大小字段；流式模式下只存放尚未写入文件的一批数据
+        self._audio_body: bytearray = bytearray()
+        self._write_audio = self._audio_body.extend
+        # 合并状态
+        self._valid_chunk_count: int = 0  # 已接收的有效块数
+        self._wav_data_offset: Optional[int] = None  # 首块 WAV data 偏移（非 WAV 为 None）
+        self._audio_size: int = 0  # 音频数据字节数（不含 WAV header）
+        self._skipped_headers: int = 0
+        self._buffer: bytearray = bytearray()  # 可变缓冲，追加为摊还 O(1)
+        self._scan_pos: int = 0  # buffer 中已确认不含换行符的前缀长度
         self._line_count: int = 0
         self._total_bytes: int = 0
         self._error_message: Optional[str] = None
         self._finished: bool = False  # 是否收到结束信号
         self._usage_info: Optional[dict] = None
 
+    def _decode_fast(self, audio_base64: str) -> bytes:
+        """
+        Base64 解码快路径：不做异常处理，解码失败时直接抛出
+
+        官方示例直接调用 base64.b64decode()；豆包的数据帧几乎总是 4 字节对齐，
+        此时直接解码，仅在长度不对齐时（罕见）补充填充符。
+        """
+        padding_needed = len(audio_base64) & 3
+        if padding_needed:
+            audio_base64 += '=' * (4 - padding_needed)
+            if self._dbg:
+                logger.debug(
+                    f"{self.log_prefix} Base64填充已应用 "
+                    f"(原长: {len(audio_base64) - (4 - padding_needed)}, 新长: {len(audio_base64)})"
+                )
+        return _b64decode(audio_base64)
+
     def _decode_audio_from_base64(self, audio_base64: str) -> Optional[bytes]:
         """
         从 Base64 字符串解码音频数据
 
         官方示例中直接使用 base64.b64decode(data["data"])，
-        但我们添加了额外的容错和验证。
+        但我们添加了额外的容错和验证。安装了 pybase64 时使用其 SIMD 实现。
+        解码失败的块记录错误后丢弃。
 
         Args:
             audio_base64: Base64 编码的音频数据
@@ -61,35 +119,25 @@ class DoubaoStreamParser:
             return None
 
         try:
-            # 官方示例直接调用 base64.b64decode()
-            # 这里添加容错处理：补充填充符（如果需要）
-            padding_needed = len(audio_base64) % 4
-            if padding_needed:
-                audio_base64 += '=' * (4 - padding_needed)
-                logger.debug(
-                    f"{self.log_prefix} Base64填充已应用 "
-                    f"(原长: {len(audio_base64) - (4 - padding_needed)}, 新长: {len(audio_base64)})"
-                )
-
-            audio_bytes = base64.b64decode(audio_base64)
+            audio_bytes = self._decode_fast(audio_base64)
+        except (ValueError, TypeError) as e:  # binascii.Error 是 ValueError 的子类
+            logger.error(
+                f"{self.log_prefix} Base64解码失败: {e} "
+                f"(数据类型: {type(audio_base64).__name__})"
+            )
+            return None
 
-            if not audio_bytes:
-                logger.warning(f"{self.log_prefix} Base64解码结果为空")
-                return None
+        if not audio_bytes:
+            logger.warning(f"{self.log_prefix} Base64解码结果为空")
+            return None
 
+        if self._dbg:
             logger.debug(
                 f"{self.log_prefix} 音频块解码成功 - 大小: {len(audio_bytes)}字节"
             )
-            return audio_bytes
+        return audio_bytes
 
-        except Exception as e:
-            logger.error(
-                f"{self.log_prefix} Base64解码失败: {e} "
-                f"(Base64长度: {len(audio_base64)})"
-            )
-            return None
-
-    def _process_json_line(self, line_str: str) -> Optional[str]:
+    def _process_json_line(self, line_bytes: bytes) -> Optional[str]:
         """
         处理单行 JSON 数据
 
@@ -101,65 +149,49 @@ class DoubaoStreamParser:
         5. code>0 → 错误
 
         Args:
-            line_str: JSON 字符串
+            line_bytes: JSON 行（原始字节，直接交给 JSON 解析器，不做 UTF-8 往返转换）
 
         Returns:
             如果收到结束信号，返回 "END"；如果发生错误，返回错误信息；否则返回 None
         """
         try:
-            json_obj = json.loads(line_str)
-        except json.JSONDecodeError as e:
-            logger.debug(f"{self.log_prefix} JSON解析失败: {e}")
+            json_obj = _json_loads(line_bytes)
+        except json.JSONDecodeError as e:  # orjson.JSONDecodeError 是其子类
+            if self._dbg:
+                logger.debug(f"{self.log_prefix} JSON解析失败: {e}")
             return None
         except Exception as e:
             logger.warning(f"{self.log_prefix} JSON处理异常: {e}")
             return None
 
-        if not isinstance(json_obj, dict):
-            logger.debug(
-                f"{self.log_prefix} 收到非字典JSON对象: {type(json_obj).__name__}"
-            )
-            return None
+        return self._process_json_obj(json_obj)
 
-        code = json_obj.get("code", -1)
+    def _process_json_obj(self, json_obj) -> Optional[str]:
+        """
+        处理已解析的 JSON 帧
 
-        # ✅ 官方逻辑：处理 code=0 的数据帧
-        if code == 0:
-            # 检查是否有音频数据
-            if "data" in json_obj and json_obj["data"]:
-                chunk_audio = self._decode_audio_from_base64(json_obj["data"])
-                if chunk_audio:
-                    self._audio_chunks.append(chunk_audio)
-                    logger.debug(
-                        f"{self.log_prefix} 音频块#{len(self._audio_chunks)} 已接收 "
-                        f"(大小: {len(chunk_audio)}字节)"
-                    )
+        Args:
+            json_obj: 解析后的 JSON 对象
 
-            # 检查是否有文本/句子信息（可选）
-            if "sentence" in json_obj and json_obj["sentence"]:
-                sentence_data = json_obj.get("sentence", {})
+        Returns:
+            同 _process_json_line
+        """
+        if not isinstance(json_obj, dict):
+            if self._dbg:
                 logger.debug(
-                    f"{self.log_prefix} 收到句子数据: {sentence_data}"
+                    f"{self.log_prefix} 收到非字典JSON对象: {type(json_obj).__name__}"
                 )
+            return None
 
-            return None  # 继续处理
-
-        # ✅ 官方逻辑：处理 code=20000000 的结束帧
-        elif code == 20000000:
-            logger.info(f"{self.log_prefix} 收到流结束信号 (code=20000000)")
-
-            # 记录用量信息（如果有）
-            if "usage" in json_obj:
-                self._usage_info = json_obj["usage"]
-                logger.info(
-                    f"{self.log_prefix} 豆包用量信息: {self._usage_info}"
-                )
+        code = json_obj.get("code", -1)
 
-            self._finished = True
-            return "END"  # 表示流已结束
+        # 按状态码分发：code=0（数据帧）和 code=20000000（结束帧）查表直达
+        handler = self._FRAME_HANDLERS.get(code)
+        if handler is not None:
+            return handler(self, json_obj)
 
         # ✅ 官方逻辑：错误处理
-        elif code and code > 0:
+        if code and code > 0:
             error_msg = json_obj.get("message", f"未知错误 (code={code})")
             logger.error(
                 f"{self.log_prefix} 豆包语音API返回错误 "
@@ -169,109 +201,154 @@ class DoubaoStreamParser:
             return error_msg  # 返回错误信息
 
         # 未知状态码
-        else:
+        if self._dbg:
             logger.debug(
                 f"{self.log_prefix} 收到未知状态码: code={code}"
             )
-            return None
-
-    def _find_data_chunk_offset(self, header: bytes) -> int:
-        """
-        在 WAV header 中查找 'data' 块的位置
+        return None
 
-        豆包返回的 WAV 可能包含额外的元数据块（如 LIST/INFO），
-        导致 'data' 块不在标准的 44 字节位置。
+    def _handle_data_frame(self, json_obj: dict) -> Optional[str]:
+        """✅ 官方逻辑：处理 code=0 的数据帧"""
+        # 检查是否有音频数据
+        data = json_obj.get("data")
+        if data:
+            chunk_audio = self._decode_audio_from_base64(data)
+            if chunk_audio:
+                self._append_audio(chunk_audio)
+                if self._dbg:
+                    logger.debug(
+                        f"{self.log_prefix} 音频块#{self._chunk_count} 已接收 "
+                        f"(大小: {len(chunk_audio)}字节)"
+                    )
 
-        Args:
-            header: WAV 文件头部数据
+        # 检查是否有文本/句子信息（可选）
+        sentence_data = json_obj.get("sentence")
+        if sentence_data:
+            if self._dbg:
+                logger.debug(
+                    f"{self.log_prefix} 收到句子数据: {sentence_data}"
+                )
 
-        Returns:
-            data 块数据开始的位置（即 'data' + 4字节大小之后）
-        """
-        pos = 12  # 跳过 RIFF(4) + size(4) + WAVE(4)
+        return None  # 继续处理
 
-        while pos < len(header) - 8:
-            chunk_id = header[pos:pos+4]
-            chunk_size = int.from_bytes(header[pos+4:pos+8], 'little')
+    def _handle_end_frame(self, json_obj: dict) -> Optional[str]:
+        """✅ 官方逻辑：处理 code=20000000 的结束帧"""
+        logger.info(f"{self.log_prefix} 收到流结束信号 (code=20000000)")
 
-            if chunk_id == b'data':
-                return pos + 8  # 返回音频数据开始位置
+        # 记录用量信息（如果有）
+        usage = json_obj.get("usage")
+        if usage is not None:
+            self._usage_info = usage
+            logger.info(
+                f"{self.log_prefix} 豆包用量信息: {self._usage_info}"
+            )
 
-            # 移动到下一个块
-            pos += 8 + chunk_size
-            # WAV 块需要对齐到偶数字节
-            if chunk_size % 2 == 1:
-                pos += 1
+        self._finished = True
+        return "END"  # 表示流已结束
 
-        # 未找到 data 块，返回默认值
-        return 44
+    # 状态码 -> 帧处理函数
+    _FRAME_HANDLERS = {
+        0: _handle_data_frame,
+        20000000: _handle_end_frame,
+    }
 
-    def _merge_audio_chunks(self, chunks: List[bytes]) -> bytes:
+    def _append_audio(self, chunk: bytes) -> None:
         """
-        合并音频块，处理 WAV 格式的流式响应
+        接收一个解码后的音频块，按到达顺序直接合并
 
         豆包流式 WAV 响应特点：
         1. 第一个块包含完整 header（可能 > 44 字节，含 LIST/INFO 元数据）
         2. header 中的大小字段是 0xFFFFFFFF（流式占位符）
-        3. 后续块是纯音频数据（无 header）
-        4. 需要在合并后修正大小字段
+        3. 后续块是纯音频数据（无 header），个别块可能带重复 header，需要剥离
+        4. 大小字段在结束时修正
 
-        Args:
-            chunks: 音频数据块列表
+        音频数据统一追加到 bytearray；流式模式下由 parse_response_to_file
+        攒够一批后在线程中写入文件，事件循环线程不执行 write 系统调用
 
-        Returns:
-            合并后的有效 WAV 文件
+        Args:
+            chunk: 音频数据块
         """
-        if not chunks:
-            return b''
-
-        first_chunk = chunks[0]
-
-        # 检查是否是 WAV 格式（RIFF header）
-        if len(first_chunk) < 44 or first_chunk[:4] != b'RIFF':
-            # 不是 WAV 格式（如 MP3），直接拼接
-            return b''.join(chunks)
-
-        # 查找 data 块的实际位置
-        data_offset = self._find_data_chunk_offset(first_chunk)
-        logger.debug(f"{self.log_prefix} WAV data 块偏移: {data_offset} 字节")
-
-        # 提取 header 和第一块的音频数据
-        header = bytearray(first_chunk[:data_offset])
-        data_parts = [first_chunk[data_offset:]]
-        skipped_headers = 0
-
-        # 处理后续块
-        for chunk in chunks[1:]:
-            if len(chunk) > 44 and chunk[:4] == b'RIFF':
-                # 后续块也有 RIFF header，需要跳过
-                chunk_data_offset = self._find_data_chunk_offset(chunk)
-                data_parts.append(chunk[chunk_data_offset:])
-                skipped_headers += 1
+        self._chunk_count += 1
+
+        # 过滤掉过小的块（可能是损坏或无效的）
+        if len(chunk) < MIN_CHUNK_SIZE:
+            return
+
+        if self._valid_chunk_count == 0:
+            # 第一个有效块：检查是否是 WAV 格式（RIFF header），记录 data 块位置
+            if len(chunk) >= 44 and _WAV_CHUNK_HEADER.unpack_from(chunk)[0] == _WAV_RIFF_ID:
+                data_offset = self._find_data_chunk_offset(chunk)
+                self._wav_data_offset = data_offset
+                # header 连同首块音频一起写出，大小字段在结束时回填
+                self._write_audio(chunk)
+                self._audio_size += len(chunk) - data_offset
             else:
-                # 纯音频数据
-                data_parts.append(chunk)
+                # 不是 WAV 格式（如 MP3），直接拼接
+                self._write_audio(chunk)
+                self._audio_size += len(chunk)
+        elif (
+            self._wav_data_offset is not None
+            and len(chunk) > 44
+            and _WAV_CHUNK_HEADER.unpack_from(chunk)[0] == _WAV_RIFF_ID
+        ):
+            # 后续块也有 RIFF header，需要跳过
+            chunk_data_offset = self._find_data_chunk_offset(chunk)
+            self._write_audio(memoryview(chunk)[chunk_data_offset:])
+            self._audio_size += len(chunk) - chunk_data_offset
+            self._skipped_headers += 1
+        else:
+            # 纯音频数据
+            self._write_audio(chunk)
+            self._audio_size += len(chunk)
+
+        self._valid_chunk_count += 1
+
+    async def _flush_output(self) -> None:
+        """把已累积的音频数据在线程中写入输出文件（流式模式）"""
+        if self._audio_body:
+            await asyncio.to_thread(self._output.write, self._audio_body)
+            # 写入期间不会继续接收数据，缓冲可直接清空复用
+            self._audio_body.clear()
+
+    def _patch_stream_wav_header(self) -> None:
+        """回填流式写入的 WAV header 大小字段（同步，需在线程中调用）"""
+        data_offset = self._wav_data_offset
+        file_size = data_offset - 8 + self._audio_size
+        self._output.flush()
+        self._output.seek(4)
+        self._output.write(file_size.to_bytes(4, 'little'))
+        self._output.seek(data_offset - 4)
+        self._output.write(self._audio_size.to_bytes(4, 'little'))
+        self._output.flush()
+
+    def _find_data_chunk_offset(self, header: bytes) -> int:
+        """
+        在 WAV header 中查找 'data' 块的位置
 
-        # 合并所有音频数据
-        audio_data = b''.join(data_parts)
-        audio_size = len(audio_data)
+        豆包返回的 WAV 可能包含额外的元数据块（如 LIST/INFO），
+        导致 'data' 块不在标准的 44 字节位置。
+
+        Args:
+            header: WAV 文件头部数据
 
-        # 修正 WAV header 中的大小字段
-        # 字节 4-7: 文件总大小 - 8 = (header_size - 8) + audio_size
-        file_size = len(header) - 8 + audio_size
-        header[4:8] = file_size.to_bytes(4, 'little')
+        Returns:
+            data 块数据开始的位置（即 'data' + 4字节大小之后）
+        """
+        pos = 12  # 跳过 RIFF(4) + size(4) + WAVE(4)
+        end = len(header) - 8
+        unpack_from = _WAV_CHUNK_HEADER.unpack_from
 
-        # 修正 data 块的大小字段（位于 data_offset - 4 处）
-        header[data_offset-4:data_offset] = audio_size.to_bytes(4, 'little')
+        while pos < end:
+            chunk_id, chunk_size = unpack_from(header, pos)
 
-        if skipped_headers > 0 or audio_size > 0:
-            logger.info(
-                f"{self.log_prefix} WAV 流式合并完成: "
-                f"header={len(header)}字节, 音频={audio_size}字节, "
-                f"跳过重复header={skipped_headers}"
-            )
+            if chunk_id == _WAV_DATA_ID:
+                return pos + 8  # 返回音频数据开始位置
+
+            # 移动到下一个块（WAV 块需要对齐到偶数字节）
+            pos += 8 + chunk_size + (chunk_size & 1)
 
-        return bytes(header) + audio_data
+        # 未找到 data 块，返回默认值
+        return 44
 
     def feed_chunk(self, chunk: bytes) -> Optional[str]:
         """
@@ -286,70 +363,105 @@ class DoubaoStreamParser:
         if not chunk:
             return None
 
-        self._buffer += chunk
+        buffer = self._buffer
+        buffer.extend(chunk)
         self._total_bytes += len(chunk)
 
         # 按行处理（官方示例使用 iter_lines）
-        while b'\n' in self._buffer:
-            line_bytes, self._buffer = self._buffer.split(b'\n', 1)
-
-            # 尝试解码行数据
-            try:
-                line_str = line_bytes.decode('utf-8', errors='replace').strip()
-            except Exception as e:
-                logger.warning(
-                    f"{self.log_prefix} 行解码失败: {e}, 跳过该行"
-                )
-                self._line_count += 1
-                continue
-
-            if not line_str:
-                continue
+        # 单指针顺序查找换行符，收集本次到达的所有完整行 (行内容, 行尾偏移)
+        # 循环内用到的方法先绑定为局部变量，省去每次迭代的属性查找
+        find_newline = buffer.find
+        lines = []
+        append_line = lines.append
+        start = 0
+        search_from = self._scan_pos
+        while True:
+            newline_pos = find_newline(b'\n', search_from)
+            if newline_pos < 0:
+                break
+
+            line_bytes = buffer[start:newline_pos].strip()
+            start = search_from = newline_pos + 1
+
+            if line_bytes:
+                append_line((line_bytes, start))
+
+        consumed = start
+        result = None
+        json_objs = self._parse_lines_batch(lines) if len(lines) > 1 else None
+        if json_objs is not None:
+            process, items = self._process_json_obj, json_objs
+        else:
+            process, items = self._process_json_line, [line for line, _ in lines]
 
-            self._line_count += 1
+        processed = 0
+        for index, item in enumerate(items):
+            processed += 1
 
             # 处理该行
-            result = self._process_json_line(line_str)
+            result = process(item)
 
-            # 如果收到结束信号或错误，立即返回
-            if result == "END":
-                return None  # 正常结束
-            elif result:  # 返回的是错误信息
-                return result
+            # 如果收到结束信号或错误，立即停止，其余行留在 buffer 中
+            if result:
+                consumed = lines[index][1]
+                break
+        self._line_count += processed
 
-        return None
+        del buffer[:consumed]
+        self._scan_pos = 0 if result else len(buffer)
 
-    def finalize(self) -> Tuple[Optional[bytes], Optional[str]]:
+        if result == "END":
+            return None  # 正常结束
+        return result  # 错误信息或 None
+
+    @staticmethod
+    def _parse_lines_batch(lines) -> Optional[list]:
         """
-        完成解析，处理剩余数据
+        将多行 JSON 拼成一个数组一次解析，摊薄逐行调用解析器的开销
+
+        Args:
+            lines: [(行内容, 行尾偏移), ...]
 
         Returns:
-            (audio_data, error_message)
-            - audio_data: 合并后的音频数据（成功时）
-            - error_message: 错误信息（失败时）
+            与行一一对应的对象列表；任一行无法解析时返回 None（调用方逐行回退）
         """
-        # 处理剩余的 buffer 中的最后一行
-        if self._buffer.strip():
-            try:
-                line_str = self._buffer.decode('utf-8', errors='replace').strip()
-                if line_str:
-                    logger.debug(
-                        f"{self.log_prefix} 处理最后的buffer数据 "
-                        f"(长度: {len(line_str)}字符)"
-                    )
-                    result = self._process_json_line(line_str)
-                    if result and result != "END":
-                        # 最后的 buffer 包含错误
-                        self._error_message = result
-            except Exception as e:
-                logger.warning(
-                    f"{self.log_prefix} 最后buffer解析异常: {e}"
+        try:
+            json_objs = _json_loads(
+                b'[' + b','.join([line for line, _ in lines]) + b']'
+            )
+        except ValueError:
+            return None
+        if not isinstance(json_objs, list) or len(json_objs) != len(lines):
+            return None
+        return json_objs
+
+    def _flush_buffer(self) -> None:
+        """处理剩余 buffer 中的最后一行"""
+        line_bytes = self._buffer.strip()
+        if line_bytes:
+            if self._dbg:
+                logger.debug(
+                    f"{self.log_prefix} 处理最后的buffer数据 "
+                    f"(长度: {len(line_bytes)}字节)"
                 )
+            result = self._process_json_line(line_bytes)
+            if result and result != "END":
+                # 最后的 buffer 包含错误
+                self._error_message = result
+
+    def _check_stream_result(self) -> Optional[str]:
+        """
+        处理剩余数据并检查整体结果
+
+        Returns:
+            错误信息，正常时返回 None
+        """
+        self._flush_buffer()
 
         logger.info(
             f"{self.log_prefix} 豆包流解析完成 - "
             f"处理行数: {self._line_count}, "
-            f"音频块数: {len(self._audio_chunks)}, "
+            f"音频块数: {self._chunk_count}, "
             f"接收字节数: {self._total_bytes}, "
             f"正常结束: {self._finished}"
         )
@@ -359,49 +471,102 @@ class DoubaoStreamParser:
             logger.error(
                 f"{self.log_prefix} 豆包API返回错误: {self._error_message}"
             )
-            return None, f"豆包语音API错误: {self._error_message}"
+            return f"豆包语音API错误: {self._error_message}"
 
         # 检查是否有音频数据
-        if not self._audio_chunks:
+        if not self._chunk_count:
             if self._total_bytes == 0:
                 logger.warning(
                     f"{self.log_prefix} 豆包API未返回任何数据"
                 )
-                return None, "未收到任何响应数据"
+                return "未收到任何响应数据"
 
             logger.warning(
                 f"{self.log_prefix} 收到 {self._total_bytes} 字节数据但无音频块"
             )
-            return None, "豆包语音未返回任何音频数据"
+            return "豆包语音未返回任何音频数据"
 
-        # ✅ 额外的数据完整性检查
-        # 过滤掉过小的块（可能是损坏或无效的）
-        min_chunk_size = 50  # 最小块大小
-        valid_chunks = [
-            chunk for chunk in self._audio_chunks
-            if len(chunk) >= min_chunk_size
-        ]
+        return None
+
+    def finalize(self) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        完成解析，处理剩余数据
+
+        Returns:
+            (audio_data, error_message)
+            - audio_data: 合并后的音频数据（成功时）
+            - error_message: 错误信息（失败时）
+        """
+        error_message = self._check_stream_result()
+        if error_message:
+            return None, error_message
 
-        if not valid_chunks:
+        if not self._valid_chunk_count:
             logger.error(
                 f"{self.log_prefix} 所有音频块都太小 (可能是损坏的数据)"
             )
-            logger.debug(
-                f"{self.log_prefix} 块大小分布: {[len(c) for c in self._audio_chunks]}"
-            )
             return None, "音频数据不完整或已损坏"
 
-        # 合并所有有效的音频数据（处理 WAV 多 header 问题）
-        merged_audio = self._merge_audio_chunks(valid_chunks)
+        audio_size = self._audio_size
+        out = self._audio_body
+        if self._wav_data_offset is not None:
+            # 原地修正 WAV header 中的大小字段
+            data_offset = self._wav_data_offset
+            # 字节 4-7: 文件总大小 - 8 = (header_size - 8) + audio_size
+            _UINT32_LE.pack_into(out, 4, data_offset - 8 + audio_size)
+            # data 块的大小字段（位于 data_offset - 4 处）
+            _UINT32_LE.pack_into(out, data_offset - 4, audio_size)
 
+            logger.info(
+                f"{self.log_prefix} WAV 流式合并完成: "
+                f"header={data_offset}字节, 音频={audio_size}字节, "
+                f"跳过重复header={self._skipped_headers}"
+            )
+
+        merged_audio = bytes(out)
         logger.info(
             f"{self.log_prefix} 音频合并完成 - "
-            f"有效块数: {len(valid_chunks)}/{len(self._audio_chunks)}, "
+            f"有效块数: {self._valid_chunk_count}/{self._chunk_count}, "
             f"总大小: {len(merged_audio)}字节"
         )
 
         return merged_audio, None
 
+    async def finalize_stream(self) -> Tuple[int, Optional[str]]:
+        """
+        完成流式解析，回填 WAV header
+
+        Returns:
+            (file_size, error_message)
+            - file_size: 写入文件的总字节数（成功时）
+            - error_message: 错误信息（失败时）
+        """
+        error_message = self._check_stream_result()
+        if error_message:
+            return 0, error_message
+
+        if not self._valid_chunk_count:
+            logger.error(
+                f"{self.log_prefix} 所有音频块都太小 (可能是损坏的数据)"
+            )
+            return 0, "音频数据不完整或已损坏"
+
+        await self._flush_output()
+
+        file_size = self._audio_size
+        if self._wav_data_offset is not None:
+            await asyncio.to_thread(self._patch_stream_wav_header)
+            file_size += self._wav_data_offset
+
+        logger.info(
+            f"{self.log_prefix} 音频流式写入完成 - "
+            f"有效块数: {self._valid_chunk_count}/{self._chunk_count}, "
+            f"跳过重复header: {self._skipped_headers}, "
+            f"总大小: {file_size}字节"
+        )
+
+        return file_size, None
+
     @classmethod
     async def parse_response(
         cls,
@@ -430,3 +595,53 @@ class DoubaoStreamParser:
 
         # 完成解析，处理剩余数据
         return parser.finalize()
+
+    @staticmethod
+    def open_output_file(path: str) -> BinaryIO:
+        """
+        打开流式写入的输出文件（同步，建议在线程中调用）
+
+        Args:
+            path: 输出文件路径
+
+        Returns:
+            二进制写入文件对象（由调用方关闭）
+        """
+        return open(path, 'wb', STREAM_WRITE_BUFFER_SIZE)
+
+    @classmethod
+    async def parse_response_to_file(
+        cls,
+        response,
+        output_file: BinaryIO,
+        log_prefix: str = "[DoubaoParser]"
+    ) -> Tuple[int, Optional[str]]:
+        """
+        解析豆包 API 的流式响应，音频块边接收边写入文件
+
+        不在内存中保留完整音频，适用于文件路径发送模式；
+        解码后的音频攒够一批（STREAM_WRITE_BUFFER_SIZE）后在线程中写入文件
+
+        Args:
+            response: aiohttp 响应对象
+            output_file: 已打开的输出文件（由调用方关闭，失败时由调用方清理）
+            log_prefix: 日志前缀
+
+        Returns:
+            (file_size, error_message)
+        """
+        parser = cls(log_prefix, output_file=output_file)
+
+        # 逐块读取响应流
+        async for chunk in response.content.iter_any():
+            result = parser.feed_chunk(chunk)
+
+            # 如果遇到错误，立即返回
+            if result and result != "END":
+                return 0, result
+
+            if len(parser._audio_body) >= STREAM_WRITE_BUFFER_SIZE:
+                await parser._flush_output()
+
+        # 完成解析，写出剩余数据并回填 header
+        return await parser.finalize_stream()
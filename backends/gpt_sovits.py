@@ -4,16 +4,21 @@ GPT-SoVITS 后端实现
 """
 
 import asyncio
+from collections import defaultdict
 from typing import Optional, Dict, Any, Tuple, ClassVar
 from .base import TTSBackendBase, TTSResult
 from ..utils.text import TTSTextUtils
 from ..utils.file import TTSFileManager
+from ..utils.json_utils import TTSJsonUtils
 from ..utils.session import TTSSessionManager
 from ..config_keys import ConfigKeys
 from src.common.logger import get_logger
 
 logger = get_logger("tts_gpt_sovits")
 
+# 请求体已预先序列化，需显式声明类型
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 
 class GPTSoVITSBackend(TTSBackendBase):
     """
@@ -28,9 +33,13 @@ class GPTSoVITSBackend(TTSBackendBase):
     support_private_chat = True
     default_audio_format = "wav"
 
-    # 类变量：记录当前加载的模型路径，避免重复切换
-    _current_gpt_weights: ClassVar[Optional[str]] = None
-    _current_sovits_weights: ClassVar[Optional[str]] = None
+    # 类变量：按服务器地址记录当前加载的模型路径 {server: {"gpt": 路径, "sovits": 路径}}，避免重复切换
+    _weight_state: ClassVar[Dict[str, Dict[str, str]]] = {}
+    # 类变量：按服务器地址区分的模型锁，切换权重与使用该权重合成在同一把锁内完成
+    _switch_locks: ClassVar[Dict[str, asyncio.Lock]] = defaultdict(asyncio.Lock)
+    # 类变量：规范化后的风格配置缓存 (原始配置对象, 规范化结果)
+    # 持有原始对象的引用，按同一性判断配置是否变化
+    _styles_cache: ClassVar[Optional[Tuple[Any, Dict[str, Any]]]] = None
 
     def get_default_voice(self) -> str:
         """获取默认风格"""
@@ -38,16 +47,18 @@ class GPTSoVITSBackend(TTSBackendBase):
 
     async def _switch_model(
         self,
+        session_manager: TTSSessionManager,
         server: str,
         gpt_weights: Optional[str],
         sovits_weights: Optional[str],
         timeout: int
     ) -> Tuple[bool, str]:
         """
-        切换 GPT-SoVITS 模型权重
+        切换 GPT-SoVITS 模型权重（调用方需持有该服务器的模型锁）
 
         Args:
-            server: 服务器地址
+            session_manager: 会话管理器（与合成请求共用）
+            server: 服务器地址（已去除末尾的 /）
             gpt_weights: GPT 模型权重路径
             sovits_weights: SoVITS 模型权重路径
             timeout: 超时时间
@@ -55,50 +66,97 @@ class GPTSoVITSBackend(TTSBackendBase):
         Returns:
             (success, error_message)
         """
-        session_manager = await TTSSessionManager.get_instance()
-
-        # 切换 GPT 权重
-        if gpt_weights and gpt_weights != GPTSoVITSBackend._current_gpt_weights:
-            gpt_url = f"{server.rstrip('/')}/set_gpt_weights?weights_path={gpt_weights}"
-            logger.info(f"{self.log_prefix} 切换GPT模型: {gpt_weights}")
-
-            try:
-                async with session_manager.get(
-                    gpt_url,
-                    backend_name="gpt_sovits",
-                    timeout=timeout
-                ) as response:
-                    if response.status == 200:
-                        GPTSoVITSBackend._current_gpt_weights = gpt_weights
-                        logger.info(f"{self.log_prefix} GPT模型切换成功")
-                    else:
-                        error_text = await response.text()
-                        return False, f"GPT模型切换失败: {error_text}"
-            except Exception as e:
-                return False, f"GPT模型切换异常: {e}"
-
-        # 切换 SoVITS 权重
-        if sovits_weights and sovits_weights != GPTSoVITSBackend._current_sovits_weights:
-            sovits_url = f"{server.rstrip('/')}/set_sovits_weights?weights_path={sovits_weights}"
-            logger.info(f"{self.log_prefix} 切换SoVITS模型: {sovits_weights}")
-
-            try:
-                async with session_manager.get(
-                    sovits_url,
-                    backend_name="gpt_sovits",
-                    timeout=timeout
-                ) as response:
-                    if response.status == 200:
-                        GPTSoVITSBackend._current_sovits_weights = sovits_weights
-                        logger.info(f"{self.log_prefix} SoVITS模型切换成功")
-                    else:
-                        error_text = await response.text()
-                        return False, f"SoVITS模型切换失败: {error_text}"
-            except Exception as e:
-                return False, f"SoVITS模型切换异常: {e}"
+        state = GPTSoVITSBackend._weight_state.setdefault(server, {})
+
+        # 权重已是目标值时跳过对应的切换
+        switches = []
+        if gpt_weights and gpt_weights != state.get("gpt"):
+            switches.append(self._set_weights(session_manager, server, "gpt", gpt_weights, timeout, state))
+        if sovits_weights and sovits_weights != state.get("sovits"):
+            switches.append(self._set_weights(session_manager, server, "sovits", sovits_weights, timeout, state))
+
+        # 两个权重互不依赖，同时切换，耗时取较长者而非两者之和
+        for success, error_msg in await asyncio.gather(*switches):
+            if not success:
+                return False, error_msg
 
         return True, ""
 
+    async def _set_weights(
+        self,
+        session_manager: TTSSessionManager,
+        server: str,
+        kind: str,
+        weights: str,
+        timeout: int,
+        state: Dict[str, str]
+    ) -> Tuple[bool, str]:
+        """
+        调用切换接口加载单个模型权重，成功后更新服务器的权重记录
+
+        Args:
+            kind: 权重类型（"gpt" 或 "sovits"，对应 set_<kind>_weights 接口）
+            weights: 模型权重路径
+            state: 该服务器当前加载的权重记录
+
+        Returns:
+            (success, error_message)
+        """
+        label = "GPT" if kind == "gpt" else "SoVITS"
+        url = f"{server}/set_{kind}_weights?weights_path={weights}"
+        logger.info(f"{self.log_prefix} 切换{label}模型: {weights}")
+
+        try:
+            async with session_manager.get(
+                url,
+                backend_name="gpt_sovits",
+                timeout=timeout
+            ) as response:
+                if response.status == 200:
+                    state[kind] = weights
+                    logger.info(f"{self.log_prefix} {label}模型切换成功")
+                    return True, ""
+                error_text = (await self._read_error_body(response, 1024)).decode('utf-8', errors='replace')
+                return False, f"{label}模型切换失败: {error_text}"
+        except Exception as e:
+            return False, f"{label}模型切换异常: {e}"
+
+    async def _request_audio(
+        self,
+        session_manager: TTSSessionManager,
+        tts_url: str,
+        data: Dict[str, Any],
+        timeout: int
+    ) -> Tuple[Optional[bytes], str]:
+        """
+        发送合成请求并读取音频
+
+        Returns:
+            (音频数据或None, 错误信息)
+        """
+        async with session_manager.post(
+            tts_url,
+            data=TTSJsonUtils.dumps(data),
+            headers=_JSON_HEADERS,
+            backend_name="gpt_sovits",
+            timeout=timeout
+        ) as response:
+            if response.status == 200:
+                audio_data, error_msg = await self._read_audio_response(response)
+                if audio_data is None:
+                    return None, f"GPT-SoVITS{error_msg}"
+
+                # 验证音频数据
+                is_valid, error_msg = TTSFileManager.validate_audio_data(audio_data)
+                if not is_valid:
+                    return None, f"GPT-SoVITS{error_msg}"
+
+                return audio_data, ""
+            else:
+                error_info = (await self._read_error_body(response, 1024)).decode('utf-8', errors='replace')
+                logger.error(f"{self.log_prefix} GPT-SoVITS API失败[{response.status}]: {error_info[:200]}")
+                return None, f"GPT-SoVITS API调用失败: {response.status}"
+
     def _normalize_styles_config(self, styles_config: Any) -> Dict[str, Any]:
         """
         规范化风格配置格式
@@ -118,24 +176,34 @@ class GPTSoVITSBackend(TTSBackendBase):
             result = {}
             for style in styles_config:
                 if isinstance(style, dict) and "name" in style:
-                    style_name = style["name"]
-                    # 复制配置，移除 name 字段
-                    style_data = {k: v for k, v in style.items() if k != "name"}
+                    # 复制配置（C 层整体拷贝），移除 name 字段
+                    style_data = dict(style)
+                    style_name = style_data.pop("name")
                     result[style_name] = style_data
             return result
 
         # 其他情况返回空字典
         return {}
 
-    def validate_config(self) -> Tuple[bool, str]:
-        """验证配置"""
+    def _get_styles(self) -> Dict[str, Any]:
+        """获取规范化后的风格配置（配置对象未变化时复用上次的结果）"""
         styles_raw = self.get_config(ConfigKeys.GPT_SOVITS_STYLES, {})
+        cached = GPTSoVITSBackend._styles_cache
+        if cached is not None and cached[0] is styles_raw:
+            return cached[1]
+
         styles = self._normalize_styles_config(styles_raw)
+        GPTSoVITSBackend._styles_cache = (styles_raw, styles)
+        return styles
 
-        if not styles or "default" not in styles:
+    def validate_config(self) -> Tuple[bool, str]:
+        """验证配置"""
+        styles = self._get_styles()
+
+        default_style = styles.get("default")
+        if default_style is None:
             return False, "GPT-SoVITS未配置任何语音风格"
 
-        default_style = styles.get("default", {})
         if not default_style.get("refer_wav") or not default_style.get("prompt_text"):
             return False, "GPT-SoVITS默认风格配置不完整（需要refer_wav和prompt_text）"
 
@@ -158,13 +226,12 @@ class GPTSoVITSBackend(TTSBackendBase):
             TTSResult
         """
         # 验证文本
-        if not text or not text.strip():
+        if not text or text.isspace():
             return TTSResult(False, "待合成的文本为空", backend_name=self.backend_name)
 
         # 获取配置
-        server = self.get_config(ConfigKeys.GPT_SOVITS_SERVER, "http://127.0.0.1:9880")
-        styles_raw = self.get_config(ConfigKeys.GPT_SOVITS_STYLES, {})
-        styles = self._normalize_styles_config(styles_raw)
+        server = self.get_config(ConfigKeys.GPT_SOVITS_SERVER, "http://127.0.0.1:9880").rstrip('/')
+        styles = self._get_styles()
         timeout = self.get_config(ConfigKeys.GENERAL_TIMEOUT, 60)
 
         # 确定使用的风格
@@ -191,14 +258,6 @@ class GPTSoVITSBackend(TTSBackendBase):
                 backend_name=self.backend_name
             )
 
-        # 如果配置了模型权重，先切换模型
-        if gpt_weights or sovits_weights:
-            switch_success, switch_error = await self._switch_model(
-                server, gpt_weights, sovits_weights, timeout
-            )
-            if not switch_success:
-                return TTSResult(False, switch_error, backend_name=self.backend_name)
-
         # 检测文本语言
         text_language = TTSTextUtils.detect_language(text)
 
@@ -211,42 +270,63 @@ class GPTSoVITSBackend(TTSBackendBase):
             "prompt_lang": prompt_language
         }
 
-        tts_url = f"{server.rstrip('/')}/tts"
+        # 相同服务/模型/请求参数的结果直接复用缓存（命中时也无需切换模型）
+        voice_info = f"风格: {voice_style}"
+        cache_key = self._audio_cache_key(server, gpt_weights, sovits_weights, data)
+        cached_audio = await self._get_cached_audio(cache_key)
+        if cached_audio is not None:
+            return await self.send_audio(
+                audio_data=cached_audio,
+                audio_format="wav",
+                prefix="tts_gpt_sovits",
+                voice_info=voice_info
+            )
+
+        tts_url = f"{server}/tts"
 
         logger.info(f"{self.log_prefix} GPT-SoVITS请求: text='{text[:50]}...', style={voice_style}")
 
-        try:
+        async def generate() -> Tuple[Optional[bytes], str]:
             session_manager = await TTSSessionManager.get_instance()
-            async with session_manager.post(
-                tts_url,
-                json=data,
-                backend_name="gpt_sovits",
-                timeout=timeout
-            ) as response:
-                if response.status == 200:
-                    audio_data = await response.read()
-
-                    # 验证音频数据
-                    is_valid, error_msg = TTSFileManager.validate_audio_data(audio_data)
-                    if not is_valid:
-                        return TTSResult(False, f"GPT-SoVITS{error_msg}", backend_name=self.backend_name)
-
-                    # 使用统一的发送方法
-                    return await self.send_audio(
-                        audio_data=audio_data,
-                        audio_format="wav",
-                        prefix="tts_gpt_sovits",
-                        voice_info=f"风格: {voice_style}"
+
+            # 未配置模型权重：直接使用服务器当前加载的模型
+            if not (gpt_weights or sovits_weights):
+                # 只在请求期间占用并发名额，发送语音时释放
+                async with self._get_semaphore():
+                    return await self._request_audio(
+                        session_manager, tts_url, data, timeout
                     )
-                else:
-                    error_info = await response.text()
-                    logger.error(f"{self.log_prefix} GPT-SoVITS API失败[{response.status}]: {error_info[:200]}")
-                    return TTSResult(
-                        False,
-                        f"GPT-SoVITS API调用失败: {response.status}",
-                        backend_name=self.backend_name
+
+            # 配置了模型权重：切换与合成在同一把服务器锁内完成，
+            # 否则其他风格的请求可能在两者之间切走权重，导致用错误的模型合成
+            async with GPTSoVITSBackend._switch_locks[server]:
+                switch_success, switch_error = await self._switch_model(
+                    session_manager, server, gpt_weights, sovits_weights, timeout
+                )
+                if not switch_success:
+                    return None, switch_error
+
+                async with self._get_semaphore():
+                    return await self._request_audio(
+                        session_manager, tts_url, data, timeout
                     )
 
+        try:
+            # 相同请求并发到达时共享同一次合成
+            audio_data, error_msg = await self._coalesce(cache_key, generate)
+            if audio_data is None:
+                return TTSResult(False, error_msg, backend_name=self.backend_name)
+
+            await self._put_cached_audio(cache_key, audio_data)
+
+            # 使用统一的发送方法
+            return await self.send_audio(
+                audio_data=audio_data,
+                audio_format="wav",
+                prefix="tts_gpt_sovits",
+                voice_info=voice_info
+            )
+
         except asyncio.TimeoutError:
             return TTSResult(False, "GPT-SoVITS API调用超时", backend_name=self.backend_name)
         except Exception as e:
@@ -5,9 +5,12 @@ GSV2P 后端实现
 
 import asyncio
 import json
-from typing import Optional, Dict, Any, Tuple
+import logging
+import random
+from typing import Optional, Dict, Any, Tuple, ClassVar
 from .base import TTSBackendBase, TTSResult
 from ..utils.file import TTSFileManager
+from ..utils.json_utils import TTSJsonUtils
 from ..utils.session import TTSSessionManager
 from ..config_keys import ConfigKeys
 from src.common.logger import get_logger
@@ -16,7 +19,21 @@ logger = get_logger("tts_gsv2p")
 
 # 重试配置
 MAX_RETRIES = 5  # 最大重试次数
-RETRY_DELAY = 3.0  # 重试间隔（秒）
+RETRY_BASE_DELAY = 1.0  # 首次重试间隔（秒），之后指数增长
+RETRY_MAX_DELAY = 10.0  # 单次重试间隔上限（秒，不含随机抖动）
+
+# 单次请求结果
+OUTCOME_OK = "ok"  # 成功
+OUTCOME_RETRYABLE = "retryable"  # 临时失败（5xx/超时/连接错误等），可重试
+OUTCOME_FATAL = "fatal"  # 请求本身有误（4xx），重试无意义
+
+# 虽为 4xx 但属于临时状态、可以重试的状态码
+_RETRYABLE_CLIENT_STATUS = frozenset({408, 429})
+
+
+def _retry_delay(attempt: int) -> float:
+    """第 attempt 次失败后的等待时间：指数退避 + 随机抖动，避免大量请求同时重试"""
+    return min(RETRY_BASE_DELAY * (2 ** (attempt - 1)), RETRY_MAX_DELAY) + random.uniform(0, 1)
 
 
 class GSV2PBackend(TTSBackendBase):
@@ -31,61 +48,121 @@ class GSV2PBackend(TTSBackendBase):
     support_private_chat = True
     default_audio_format = "mp3"
 
+    # 类变量：与文本无关的请求上下文 (配置元组, 请求头, 请求体模板)
+    # 配置变化时重建；请求头与模板只读，每次请求浅拷贝模板后填入文本和音色
+    _request_context: ClassVar[Optional[Tuple[Tuple[Any, ...], Dict[str, str], Dict[str, Any]]]] = None
+
+    # 实例级 Token 缓存（见 api_token 属性）
+    _api_token: Optional[str] = None
+
+    @property
+    def api_token(self) -> str:
+        """API Token（实例按请求创建，验证配置与构建请求头共用一次读取）"""
+        if self._api_token is None:
+            self._api_token = self.get_config(ConfigKeys.GSV2P_API_TOKEN, "")
+        return self._api_token
+
     def get_default_voice(self) -> str:
         """获取默认音色"""
         return self.get_config(ConfigKeys.GSV2P_DEFAULT_VOICE, "原神-中文-派蒙_ZH")
 
     def validate_config(self) -> Tuple[bool, str]:
         """验证配置"""
-        api_token = self.get_config(ConfigKeys.GSV2P_API_TOKEN, "")
-        if not api_token:
+        if not self.api_token:
             return False, "GSV2P后端缺少API Token配置"
         return True, ""
 
+    def _get_request_context(self) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        获取请求头和请求体模板（model/response_format/speed）
+
+        Returns:
+            (请求头, 请求体模板)，均为只读，调用方需浅拷贝后再修改
+        """
+        config = (
+            self.api_token,
+            self.get_config(ConfigKeys.GSV2P_MODEL, "tts-v4"),
+            self.get_config(ConfigKeys.GSV2P_RESPONSE_FORMAT, "mp3"),
+            self.get_config(ConfigKeys.GSV2P_SPEED, 1),
+        )
+        cached = GSV2PBackend._request_context
+        if cached is not None and cached[0] == config:
+            return cached[1], cached[2]
+
+        api_token, model, response_format, speed = config
+        headers = {
+            "accept": "application/json",
+            "Authorization": f"Bearer {api_token}",
+            "Content-Type": "application/json"
+        }
+        # 注意：other_params 已被 API 废弃，不再支持
+        template: Dict[str, Any] = {
+            "model": model,
+            "response_format": response_format,
+            "speed": speed
+        }
+
+        GSV2PBackend._request_context = (config, headers, template)
+        return headers, template
+
     async def _make_request(
         self,
+        session_manager: TTSSessionManager,
         api_url: str,
         request_data: Dict[str, Any],
         headers: Dict[str, str],
         timeout: int
-    ) -> Tuple[bool, Any, str]:
+    ) -> Tuple[str, Any, str]:
         """
         发送单次API请求
 
+        Args:
+            session_manager: 会话管理器（由 execute 获取一次，重试间复用）
+
         Returns:
-            (成功标志, 音频数据或None, 错误信息)
+            (请求结果 OUTCOME_*, 音频数据或None, 错误信息)
         """
-        session_manager = await TTSSessionManager.get_instance()
         async with session_manager.post(
             api_url,
-            json=request_data,
+            data=TTSJsonUtils.dumps(request_data),
             headers=headers,
             backend_name="gsv2p",
             timeout=timeout
         ) as response:
+            # 先根据状态码和响应头判断，错误响应只读取开头部分
             if response.status == 200:
                 content_type = response.headers.get('Content-Type', '')
-                audio_data = await response.read()
 
                 # 检查是否返回了JSON错误（服务端不稳定时会返回参数错误）
                 if 'application/json' in content_type:
                     try:
-                        error_json = json.loads(audio_data.decode('utf-8'))
+                        error_json = TTSJsonUtils.loads(await self._read_error_body(response))
                         error_msg = error_json.get('error', {}).get('message', str(error_json))
                         # 参数错误通常是服务端临时问题，可以重试
-                        return False, None, f"API返回错误: {error_msg}"
+                        return OUTCOME_RETRYABLE, None, f"API返回错误: {error_msg}"
                     except Exception:
-                        return False, None, "API返回异常响应"
+                        return OUTCOME_RETRYABLE, None, "API返回异常响应"
+
+                # 分块读取音频，开头不是音频时提前放弃
+                audio_data, error_msg = await self._read_audio_response(response)
+                if audio_data is None:
+                    return OUTCOME_RETRYABLE, None, f"音频数据无效: {error_msg}"
 
                 # 验证音频数据
                 is_valid, error_msg = TTSFileManager.validate_audio_data(audio_data)
                 if not is_valid:
-                    return False, None, f"音频数据无效: {error_msg}"
+                    return OUTCOME_RETRYABLE, None, f"音频数据无效: {error_msg}"
 
-                return True, audio_data, ""
+                return OUTCOME_OK, audio_data, ""
             else:
-                error_text = await response.text()
-                return False, None, f"API调用失败: {response.status} - {error_text[:100]}"
+                error_text = (await self._read_error_body(response, 512)).decode('utf-8', errors='replace')
+                status = response.status
+                outcome = (
+                    OUTCOME_FATAL
+                    if 400 <= status < 500 and status not in _RETRYABLE_CLIENT_STATUS
+                    else OUTCOME_RETRYABLE
+                )
+                return outcome, None, f"API调用失败: {status} - {error_text[:100]}"
 
     async def execute(
         self,
@@ -109,69 +186,109 @@ class GSV2PBackend(TTSBackendBase):
             return TTSResult(False, error_msg, backend_name=self.backend_name)
 
         # 验证文本
-        if not text or not text.strip():
+        if not text or text.isspace():
             return TTSResult(False, "待合成的文本为空", backend_name=self.backend_name)
 
         # 获取配置
         api_url = self.get_config(ConfigKeys.GSV2P_API_URL, "https://gsv2p.acgnai.top/v1/audio/speech")
-        api_token = self.get_config(ConfigKeys.GSV2P_API_TOKEN, "")
         timeout = self.get_config(ConfigKeys.GSV2P_TIMEOUT, 30)
 
         if not voice:
             voice = self.get_default_voice()
 
-        # 构建请求参数（注意：other_params 已被 API 废弃，不再支持）
+        # 构建请求参数（固定部分复用缓存的模板）
+        headers, template = self._get_request_context()
         request_data: Dict[str, Any] = {
-            "model": self.get_config(ConfigKeys.GSV2P_MODEL, "tts-v4"),
+            **template,
             "input": text,
-            "voice": voice,
-            "response_format": self.get_config(ConfigKeys.GSV2P_RESPONSE_FORMAT, "mp3"),
-            "speed": self.get_config(ConfigKeys.GSV2P_SPEED, 1)
+            "voice": voice
         }
 
-        headers = {
-            "accept": "application/json",
-            "Authorization": f"Bearer {api_token}",
-            "Content-Type": "application/json"
-        }
+        # 相同请求参数的结果直接复用缓存
+        audio_format = template["response_format"]
+        voice_info = f"音色: {voice}"
+        cache_key = self._audio_cache_key(request_data)
+        cached_audio = await self._get_cached_audio(cache_key)
+        if cached_audio is not None:
+            return await self.send_audio(
+                audio_data=cached_audio,
+                audio_format=audio_format,
+                prefix="tts_gsv2p",
+                voice_info=voice_info
+            )
 
         logger.info(f"{self.log_prefix} GSV2P请求: text='{text[:50]}...', voice={voice}")
-        logger.debug(f"{self.log_prefix} GSV2P完整请求参数: {json.dumps(request_data, ensure_ascii=False, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{self.log_prefix} GSV2P完整请求参数: {json.dumps(request_data, ensure_ascii=False, indent=2)}")
+
+        async def fetch() -> Tuple[Optional[bytes], str]:
+            return await self._request_with_retry(api_url, request_data, headers, timeout)
+
+        # 相同请求并发到达时共享同一次API调用（含重试）
+        audio_data, error_msg = await self._coalesce(cache_key, fetch)
+        if audio_data is None:
+            return TTSResult(False, error_msg, backend_name=self.backend_name)
+
+        await self._put_cached_audio(cache_key, audio_data)
+
+        # 使用统一的发送方法
+        return await self.send_audio(
+            audio_data=audio_data,
+            audio_format=audio_format,
+            prefix="tts_gsv2p",
+            voice_info=voice_info
+        )
+
+    async def _request_with_retry(
+        self,
+        api_url: str,
+        request_data: Dict[str, Any],
+        headers: Dict[str, str],
+        timeout: int
+    ) -> Tuple[Optional[bytes], str]:
+        """
+        发送API请求（带重试机制）
 
+        Returns:
+            (音频数据或None, 错误信息)
+        """
+        session_manager = await TTSSessionManager.get_instance()
+        semaphore = self._get_semaphore()
         last_error = ""
+        attempt = 0
         for attempt in range(1, MAX_RETRIES + 1):
             try:
-                success, audio_data, error_msg = await self._make_request(
-                    api_url, request_data, headers, timeout
-                )
+                # 只在请求期间占用并发名额，重试等待时释放
+                async with semaphore:
+                    outcome, audio_data, error_msg = await self._make_request(
+                        session_manager, api_url, request_data, headers, timeout
+                    )
 
-                if success and audio_data:
+                if outcome == OUTCOME_OK and audio_data:
                     if attempt > 1:
                         logger.info(f"{self.log_prefix} GSV2P第{attempt}次重试成功")
 
                     logger.info(f"{self.log_prefix} GSV2P响应: 数据大小={len(audio_data)}字节")
+                    return audio_data, ""
 
-                    # 使用统一的发送方法
-                    audio_format = self.get_config(ConfigKeys.GSV2P_RESPONSE_FORMAT, "mp3")
-                    return await self.send_audio(
-                        audio_data=audio_data,
-                        audio_format=audio_format,
-                        prefix="tts_gsv2p",
-                        voice_info=f"音色: {voice}"
-                    )
+                last_error = error_msg
+                if outcome == OUTCOME_FATAL:
+                    # 请求本身有误（如鉴权失败、参数非法），重试不会成功
+                    logger.error(f"{self.log_prefix} GSV2P请求失败，不再重试: {error_msg}")
+                    break
+                if attempt < MAX_RETRIES:
+                    delay = _retry_delay(attempt)
+                    logger.warning(f"{self.log_prefix} GSV2P请求失败 ({error_msg}), {delay:.1f}秒后重试 (尝试 {attempt}/{MAX_RETRIES})")
+                    await asyncio.sleep(delay)
                 else:
-                    last_error = error_msg
-                    if attempt < MAX_RETRIES:
-                        logger.warning(f"{self.log_prefix} GSV2P请求失败 ({error_msg}), {RETRY_DELAY}秒后重试 (尝试 {attempt}/{MAX_RETRIES})")
-                        await asyncio.sleep(RETRY_DELAY)
-                    else:
-                        logger.error(f"{self.log_prefix} GSV2P请求失败，已达最大重试次数: {error_msg}")
+                    logger.error(f"{self.log_prefix} GSV2P请求失败，已达最大重试次数: {error_msg}")
 
             except asyncio.TimeoutError:
                 last_error = "API调用超时"
                 if attempt < MAX_RETRIES:
-                    logger.warning(f"{self.log_prefix} GSV2P超时, {RETRY_DELAY}秒后重试 (尝试 {attempt}/{MAX_RETRIES})")
-                    await asyncio.sleep(RETRY_DELAY)
+                    delay = _retry_delay(attempt)
+                    logger.warning(f"{self.log_prefix} GSV2P超时, {delay:.1f}秒后重试 (尝试 {attempt}/{MAX_RETRIES})")
+                    await asyncio.sleep(delay)
                 else:
                     logger.error(f"{self.log_prefix} GSV2P超时，已达最大重试次数")
 
@@ -179,8 +296,6 @@ class GSV2PBackend(TTSBackendBase):
                 last_error = str(e)
                 logger.error(f"{self.log_prefix} GSV2P执行错误: {e}")
                 if attempt < MAX_RETRIES:
-                    await asyncio.sleep(RETRY_DELAY)
-                else:
-                    break
+                    await asyncio.sleep(_retry_delay(attempt))
 
-        return TTSResult(False, f"GSV2P {last_error} (已重试{MAX_RETRIES}次)", backend_name=self.backend_name)
+        return None, f"GSV2P {last_error} (已尝试{attempt}次)"
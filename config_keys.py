@@ -21,6 +21,9 @@ class ConfigKeys:
     GENERAL_SPLIT_SENTENCES = "general.split_sentences"
     GENERAL_SPLIT_DELAY = "general.split_delay"
     GENERAL_SEND_ERROR_MESSAGES = "general.send_error_messages"
+    GENERAL_MAX_CONCURRENCY = "general.max_concurrency"
+    GENERAL_TTS_CACHE_SIZE = "general.tts_cache_size"
+    GENERAL_TTS_CACHE_MAX_BYTES = "general.tts_cache_max_bytes"
 
     # ========== Components 组件配置 ==========
     COMPONENTS_ACTION_ENABLED = "components.action_enabled"
@@ -62,6 +65,7 @@ class ConfigKeys:
     DOUBAO_SPEED = "doubao.speed"
     DOUBAO_VOLUME = "doubao.volume"
     DOUBAO_CONTEXT_TEXTS = "doubao.context_texts"
+    DOUBAO_MAX_TEXT_LENGTH = "doubao.max_text_length"
 
     # ========== CosyVoice 配置 ==========
     COSYVOICE_GRADIO_URL = "cosyvoice.gradio_url"
@@ -71,3 +75,5 @@ class ConfigKeys:
     COSYVOICE_PROMPT_TEXT = "cosyvoice.prompt_text"
     COSYVOICE_TIMEOUT = "cosyvoice.timeout"
     COSYVOICE_AUDIO_FORMAT = "cosyvoice.audio_format"
+    COSYVOICE_MAX_CONCURRENCY = "cosyvoice.max_concurrency"
+    COSYVOICE_MAX_TEXT_LENGTH = "cosyvoice.max_text_length"
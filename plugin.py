@@ -10,6 +10,7 @@ import sys
 sys.dont_write_bytecode = True
 
 import asyncio
+import logging
 import random
 from typing import List, Tuple, Type, Optional
 
@@ -24,15 +25,24 @@ from src.plugin_system.apis import generator_api
 
 # 导入模块化的后端和工具
 from .backends import TTSBackendRegistry, TTSResult
-from .backends.ai_voice import AI_VOICE_ALIAS_MAP
-from .backends.doubao import DOUBAO_EMOTION_MAP
 from .utils.text import TTSTextUtils
 from .config_keys import ConfigKeys
 
 logger = get_logger("tts_voice_plugin")
 
-# 有效后端列表
-VALID_BACKENDS = ["ai_voice", "gsv2p", "gpt_sovits", "doubao", "cosyvoice"]
+# 有效后端集合（仅用于成员判断）
+VALID_BACKENDS = frozenset(("ai_voice", "gsv2p", "gpt_sovits", "doubao", "cosyvoice"))
+
+# 命令前缀到后端的映射（按顺序匹配）
+COMMAND_PREFIX_BACKENDS = (
+    ("/gsv2p", "gsv2p"),
+    ("/gptsovits", "gpt_sovits"),
+    ("/doubao", "doubao"),
+    ("/cosyvoice", "cosyvoice"),
+    ("/voice", "ai_voice"),
+)
+# 所有命令前缀，供 str.startswith 一次判断
+COMMAND_PREFIXES = tuple(prefix for prefix, _ in COMMAND_PREFIX_BACKENDS)
 
 
 class TTSExecutorMixin:
@@ -258,12 +268,14 @@ class UnifiedTTSAction(BaseAction, TTSExecutorMixin):
 
                 success_count = 0
                 all_sentences_text = []
+                debug_enabled = logger.isEnabledFor(logging.DEBUG)
 
                 for i, sentence in enumerate(sentences):
                     if not sentence.strip():
                         continue
 
-                    logger.debug(f"{self.log_prefix} 发送第 {i + 1}/{len(sentences)} 句: {sentence[:30]}...")
+                    if debug_enabled:
+                        logger.debug(f"{self.log_prefix} 发送第 {i + 1}/{len(sentences)} 句: {sentence[:30]}...")
                     result = await self._execute_backend(backend, sentence, voice, emotion)
 
                     if result.success:
@@ -442,17 +454,10 @@ class UnifiedTTSCommand(BaseCommand, TTSExecutorMixin):
             (backend_name, source_description)
         """
         # 1. 检查命令前缀
-        raw_text = self.message.raw_message if self.message.raw_message else self.message.processed_plain_text
-        if raw_text:
-            # 命令前缀到后端的映射
-            prefix_backend_map = {
-                "/gsv2p": "gsv2p",
-                "/gptsovits": "gpt_sovits",
-                "/doubao": "doubao",
-                "/cosyvoice": "cosyvoice",
-                "/voice": "ai_voice",
-            }
-            for prefix, backend in prefix_backend_map.items():
+        message = self.message
+        raw_text = message.raw_message or message.processed_plain_text
+        if raw_text and raw_text.startswith(COMMAND_PREFIXES):
+            for prefix, backend in COMMAND_PREFIX_BACKENDS:
                 if raw_text.startswith(prefix):
                     return backend, f"命令前缀 {prefix}"
 
@@ -582,6 +587,18 @@ class UnifiedTTSPlugin(BasePlugin):
             "send_error_messages": ConfigField(
                 type=bool, default=True,
                 description="是否发送错误提示消息（关闭后语音合成失败时不会发送错误信息给用户）"
+            ),
+            "max_concurrency": ConfigField(
+                type=int, default=3,
+                description="每个后端同时进行的最大合成请求数（超出的请求排队等待）"
+            ),
+            "tts_cache_size": ConfigField(
+                type=int, default=128,
+                description="合成音频缓存条数（相同文本和音色直接复用，0为关闭）"
+            ),
+            "tts_cache_max_bytes": ConfigField(
+                type=int, default=67108864,
+                description="合成音频缓存占用的内存上限（字节，默认64MB；单条音频超过上限的1/8时不缓存）"
             )
         },
         "components": {
@@ -663,6 +680,10 @@ class UnifiedTTSPlugin(BasePlugin):
             "audio_format": ConfigField(type=str, default="wav", description="音频格式"),
             "sample_rate": ConfigField(type=int, default=24000, description="采样率"),
             "bitrate": ConfigField(type=int, default=128000, description="比特率"),
+            "max_text_length": ConfigField(
+                type=int, default=1024,
+                description="单次请求最大文本长度（超出部分截断，避免API拒绝）"
+            ),
             "speed": ConfigField(type=float, default=None, description="语音速度（可选）"),
             "volume": ConfigField(type=float, default=None, description="音量（可选）"),
             "context_texts": ConfigField(
@@ -697,7 +718,15 @@ class UnifiedTTSPlugin(BasePlugin):
                 description="提示文本（用于3s极速复刻模式）"
             ),
             "timeout": ConfigField(type=int, default=300, description="API请求超时（秒）"),
-            "audio_format": ConfigField(type=str, default="wav", description="音频格式")
+            "audio_format": ConfigField(type=str, default="wav", description="音频格式"),
+            "max_concurrency": ConfigField(
+                type=int, default=1,
+                description="最大并发请求数（Gradio 服务逐条推理，并发过高只会增加延迟）"
+            ),
+            "max_text_length": ConfigField(
+                type=int, default=2000,
+                description="单次请求最大文本长度（超出部分截断）"
+            )
         }
     }
 
@@ -705,6 +734,9 @@ class UnifiedTTSPlugin(BasePlugin):
         """返回插件组件列表"""
         components = []
 
+        # 后端注册已在导入 backends 包时完成，此后注册表只读
+        TTSBackendRegistry.freeze()
+
         try:
             action_enabled = self.get_config(ConfigKeys.COMPONENTS_ACTION_ENABLED, True)
             command_enabled = self.get_config(ConfigKeys.COMPONENTS_COMMAND_ENABLED, True)
@@ -8,5 +8,6 @@ sys.dont_write_bytecode = True
 from .text import TTSTextUtils
 from .session import TTSSessionManager
 from .file import TTSFileManager
+from .json_utils import TTSJsonUtils
 
-__all__ = ["TTSTextUtils", "TTSSessionManager", "TTSFileManager"]
+__all__ = ["TTSTextUtils", "TTSSessionManager", "TTSFileManager", "TTSJsonUtils"]
@@ -4,18 +4,38 @@
 """
 
 import os
+import shutil
 import uuid
 import tempfile
 import asyncio
 import base64
-from typing import Optional
+import logging
+from typing import Optional, Union
 from src.common.logger import get_logger
 
+try:
+    # 可选依赖：SIMD 加速的 base64 编码，直接输出 str
+    import pybase64
+except ImportError:  # pragma: no cover - 可选依赖
+    pybase64 = None
+
 logger = get_logger("tts_file_manager")
 
 # 音频数据最小有效大小（字节）
 MIN_AUDIO_SIZE = 100
 
+# 音频写入缓冲区大小（字节），多 MB 的 WAV 也只需少量 write 系统调用
+AUDIO_WRITE_BUFFER_SIZE = 1 << 18
+
+# 分块读取 HTTP 音频响应的块大小（字节）
+AUDIO_READ_CHUNK_SIZE = 1 << 16
+
+# 判断响应头部所需的字节数
+AUDIO_HEADER_PROBE_SIZE = 16
+
+# 文本类错误响应（JSON/HTML/XML）的开头，真实音频数据不会以此开头
+_TEXT_BODY_PREFIXES = (b'{"', b"{'", b'<!', b'<?', b'<h', b'<H')
+
 
 class TTSFileManager:
     """
@@ -159,10 +179,10 @@ class TTSFileManager:
             是否写入成功
         """
         try:
-            # 使用线程池执行同步文件写入，避免阻塞事件循环
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, cls._write_file_sync, path, data)
-            logger.debug(f"音频文件写入成功: {path} ({len(data)} bytes)")
+            # 在线程中执行同步文件写入，避免阻塞事件循环
+            await asyncio.to_thread(cls._write_file_sync, path, data)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"音频文件写入成功: {path} ({len(data)} bytes)")
             return True
         except IOError as e:
             logger.error(f"写入音频文件失败: {path}, 错误: {e}")
@@ -173,8 +193,8 @@ class TTSFileManager:
 
     @staticmethod
     def _write_file_sync(path: str, data: bytes):
-        """同步写入文件（内部方法）"""
-        with open(path, "wb") as f:
+        """同步写入文件（内部方法），整段数据一次写入"""
+        with open(path, "wb", buffering=AUDIO_WRITE_BUFFER_SIZE) as f:
             f.write(data)
 
     @classmethod
@@ -200,6 +220,34 @@ class TTSFileManager:
             logger.error(f"写入音频文件时发生未知错误: {path}, 错误: {e}")
             return False
 
+    @classmethod
+    async def link_file_async(cls, src: str, dst: str) -> bool:
+        """
+        异步为已有文件创建新路径（优先硬链接，不支持时复制），数据不经过内存
+
+        Args:
+            src: 源文件路径
+            dst: 新文件路径
+
+        Returns:
+            是否成功（源文件已被清理时返回False）
+        """
+        try:
+            await asyncio.to_thread(cls._link_file_sync, src, dst)
+            return True
+        except OSError as e:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"链接音频文件失败: {src} -> {dst}, 错误: {e}")
+            return False
+
+    @staticmethod
+    def _link_file_sync(src: str, dst: str):
+        """同步创建文件链接（内部方法），跨文件系统等无法硬链接时复制"""
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+
     @classmethod
     def cleanup_file(cls, path: str, silent: bool = True) -> bool:
         """
@@ -215,7 +263,8 @@ class TTSFileManager:
         try:
             if path and os.path.exists(path):
                 os.remove(path)
-                logger.debug(f"临时文件已清理: {path}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"临时文件已清理: {path}")
                 return True
             return False
         except Exception as e:
@@ -237,8 +286,7 @@ class TTSFileManager:
         """
         if delay > 0:
             await asyncio.sleep(delay)
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, cls.cleanup_file, path, True)
+        return await asyncio.to_thread(cls.cleanup_file, path, True)
 
     @classmethod
     def validate_audio_data(cls, data: bytes, min_size: int = None) -> tuple:
@@ -255,18 +303,52 @@ class TTSFileManager:
         if data is None:
             return False, "音频数据为空"
 
+        return cls.validate_audio_size(len(data), min_size)
+
+    @staticmethod
+    def validate_audio_header(head: bytes) -> tuple:
+        """
+        根据数据开头判断是否为音频（用于在下载完成前尽早发现错误响应）
+
+        只排除明显的文本响应（JSON/HTML/XML），不限定具体音频格式，
+        因此 pcm 等无文件头的格式也能通过
+
+        Args:
+            head: 数据开头的若干字节
+
+        Returns:
+            (is_valid, error_message)
+        """
+        if head.lstrip()[:2] in _TEXT_BODY_PREFIXES:
+            return False, "响应内容不是音频（疑似文本错误信息）"
+        return True, ""
+
+    @classmethod
+    def validate_audio_size(cls, size: int, min_size: int = None) -> tuple:
+        """
+        按字节数验证音频有效性（用于已流式写入文件的音频）
+
+        Args:
+            size: 音频字节数
+            min_size: 最小有效大小
+
+        Returns:
+            (is_valid, error_message)
+        """
         min_size = min_size or MIN_AUDIO_SIZE
 
-        if len(data) < min_size:
-            return False, f"音频数据过小({len(data)}字节 < {min_size}字节)"
+        if size < min_size:
+            return False, f"音频数据过小({size}字节 < {min_size}字节)"
 
         return True, ""
 
     @classmethod
-    def audio_to_base64(cls, data: bytes) -> str:
+    def audio_to_base64(cls, data: Union[bytes, memoryview]) -> str:
         """
         将音频数据转换为base64字符串
 
+        安装了 pybase64 时使用其 SIMD 实现并直接生成 str，省去中间的 bytes 副本
+
         Args:
             data: 音频二进制数据
 
@@ -274,7 +356,9 @@ class TTSFileManager:
             base64编码的字符串
         """
         try:
-            return base64.b64encode(data).decode('utf-8')
+            if pybase64 is not None:
+                return pybase64.b64encode_as_string(data)
+            return base64.b64encode(data).decode('ascii')
         except Exception as e:
             logger.error(f"音频数据转base64失败: {e}")
             return ""
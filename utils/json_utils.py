@@ -0,0 +1,46 @@
+"""
+JSON 编解码工具
+优先使用 orjson（可选依赖），未安装时回退到标准库 json
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+
+class TTSJsonUtils:
+    """
+    JSON 编解码工具类
+
+    编码结果统一为 UTF-8 bytes，可直接作为 HTTP 请求体发送
+    """
+
+    # 是否使用 orjson
+    USE_ORJSON = orjson is not None
+
+    if orjson is not None:
+        @staticmethod
+        def dumps(obj: Any) -> bytes:
+            """序列化为 JSON bytes"""
+            return orjson.dumps(obj)
+
+        @staticmethod
+        def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+            """解析 JSON"""
+            return orjson.loads(data)
+    else:
+        @staticmethod
+        def dumps(obj: Any) -> bytes:
+            """序列化为 JSON bytes"""
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        @staticmethod
+        def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+            """解析 JSON"""
+            if isinstance(data, memoryview):
+                data = data.tobytes()
+            return json.loads(data)
@@ -4,6 +4,7 @@ HTTP Session 管理器
 """
 
 import asyncio
+import sys
 import aiohttp
 from typing import Optional, Dict, Any
 from contextlib import asynccontextmanager
@@ -11,6 +12,10 @@ from src.common.logger import get_logger
 
 logger = get_logger("tts_session_manager")
 
+# 异常关闭的 SSL 连接需要 aiohttp 主动回收的 Python 版本（3.12.7+/3.13.1+ 已在标准库修复，
+# 新版 aiohttp 在这些版本上启用 enable_cleanup_closed 只会产生 DeprecationWarning）
+_NEEDS_CLEANUP_CLOSED = sys.version_info < (3, 12, 7) or (3, 13, 0) <= sys.version_info < (3, 13, 1)
+
 
 class TTSSessionManager:
     """
@@ -25,9 +30,22 @@ class TTSSessionManager:
     _instance: Optional["TTSSessionManager"] = None
     _lock = asyncio.Lock()
 
+    # 需要禁用连接复用的后端（GSV2P 等 API 复用连接时存在兼容性问题）
+    # 其他后端保持 keep-alive，连续请求复用同一连接，省去重复的 TCP/TLS 握手
+    FORCE_CLOSE_BACKENDS = frozenset({"gsv2p"})
+
     def __init__(self):
         self._sessions: Dict[str, aiohttp.ClientSession] = {}
         self._default_timeout = 60
+        # 按超时秒数复用的 ClientTimeout（不可变对象，可安全共享；取值只来自少量配置项）
+        self._timeouts: Dict[float, aiohttp.ClientTimeout] = {}
+
+    def _get_timeout(self, total: float) -> aiohttp.ClientTimeout:
+        """获取指定总超时的 ClientTimeout（相同秒数复用同一对象）"""
+        client_timeout = self._timeouts.get(total)
+        if client_timeout is None:
+            client_timeout = self._timeouts[total] = aiohttp.ClientTimeout(total=total)
+        return client_timeout
 
     @classmethod
     async def get_instance(cls) -> "TTSSessionManager":
@@ -55,15 +73,19 @@ class TTSSessionManager:
         """
         if backend_name not in self._sessions or self._sessions[backend_name].closed:
             timeout_val = timeout or self._default_timeout
+            force_close = backend_name in self.FORCE_CLOSE_BACKENDS
             connector = aiohttp.TCPConnector(
-                limit=10,  # 每个主机最大连接数
-                limit_per_host=5,
+                limit=100,  # 连接池总连接数
+                limit_per_host=20,  # 每个主机最大连接数（实际并发由后端信号量限制）
                 ttl_dns_cache=300,  # DNS缓存5分钟
-                force_close=True,  # 禁用连接复用，修复GSV2P等API的兼容性问题
+                enable_cleanup_closed=_NEEDS_CLEANUP_CLOSED,  # 仅在需要的 Python 版本上回收异常关闭的SSL连接
+                force_close=force_close,
+                # 空闲连接保留75秒，覆盖语音请求之间的常见间隔（force_close 时不允许设置）
+                keepalive_timeout=None if force_close else 75,
             )
             self._sessions[backend_name] = aiohttp.ClientSession(
                 connector=connector,
-                timeout=aiohttp.ClientTimeout(total=timeout_val)
+                timeout=self._get_timeout(timeout_val)
             )
             logger.debug(f"创建新的HTTP Session: {backend_name}")
 
@@ -118,10 +140,8 @@ class TTSSessionManager:
         """
         session = await self.get_session(backend_name, timeout)
 
-        # 如果指定了不同的超时时间，创建新的超时对象
-        req_timeout = None
-        if timeout:
-            req_timeout = aiohttp.ClientTimeout(total=timeout)
+        # 如果指定了不同的超时时间，使用对应的超时对象
+        req_timeout = self._get_timeout(timeout) if timeout else None
 
         response = await session.post(
             url,
@@ -163,10 +183,8 @@ class TTSSessionManager:
         """
         session = await self.get_session(backend_name, timeout)
 
-        # 如果指定了不同的超时时间，创建新的超时对象
-        req_timeout = None
-        if timeout:
-            req_timeout = aiohttp.ClientTimeout(total=timeout)
+        # 如果指定了不同的超时时间，使用对应的超时对象
+        req_timeout = self._get_timeout(timeout) if timeout else None
 
         response = await session.get(
             url,
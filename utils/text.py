@@ -3,7 +3,7 @@
 """
 
 import re
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 
 
 class TTSTextUtils:
@@ -30,6 +30,11 @@ class TTSTextUtils:
     ENGLISH_PATTERN = re.compile(r'[a-zA-Z]')
     JAPANESE_PATTERN = re.compile(r'[\u3040-\u309f\u30a0-\u30ff]')
 
+    # 语言统计用的连续片段正则：按片段匹配后累加长度，匹配对象数远少于逐字匹配
+    _CHINESE_RUN_PATTERN = re.compile(r'[\u4e00-\u9fff]+')
+    _ENGLISH_RUN_PATTERN = re.compile(r'[a-zA-Z]+')
+    _JAPANESE_RUN_PATTERN = re.compile(r'[\u3040-\u309f\u30a0-\u30ff]+')
+
     @classmethod
     def clean_text(cls, text: str, max_length: int = 500) -> str:
         """
@@ -55,6 +60,27 @@ class TTSTextUtils:
 
         return text.strip()
 
+    @staticmethod
+    def prepare_text(text: Optional[str], max_len: int = 0) -> Tuple[Optional[str], bool]:
+        """
+        规范化待合成文本（去除首尾空白并按后端上限截断）
+
+        Args:
+            text: 原始文本
+            max_len: 最大长度，<=0 表示不限制
+
+        Returns:
+            (处理后的文本, 是否被截断)，文本为空时返回 (None, False)
+        """
+        if not text:
+            return None, False
+        text = text.strip()
+        if not text:
+            return None, False
+        if max_len > 0 and len(text) > max_len:
+            return text[:max_len], True
+        return text, False
+
     @classmethod
     def detect_language(cls, text: str) -> str:
         """
@@ -69,9 +95,14 @@ class TTSTextUtils:
         if not text:
             return "zh"
 
-        chinese_chars = len(cls.CHINESE_PATTERN.findall(text))
-        english_chars = len(cls.ENGLISH_PATTERN.findall(text))
-        japanese_chars = len(cls.JAPANESE_PATTERN.findall(text))
+        # 快速路径：纯 ASCII 文本只可能含英文字母，
+        # 有字母即英文占比 100%，无字母则与无可识别字符时相同，结果与完整统计一致
+        if text.isascii():
+            return "en" if cls.ENGLISH_PATTERN.search(text) else "zh"
+
+        chinese_chars = sum(map(len, cls._CHINESE_RUN_PATTERN.findall(text)))
+        english_chars = sum(map(len, cls._ENGLISH_RUN_PATTERN.findall(text)))
+        japanese_chars = sum(map(len, cls._JAPANESE_RUN_PATTERN.findall(text)))
         total_chars = chinese_chars + english_chars + japanese_chars
 
         if total_chars == 0:
@@ -90,42 +121,30 @@ class TTSTextUtils:
         else:
             return "zh"
 
+    @staticmethod
+    def normalize_voice_key(voice: str) -> str:
+        """规范化音色查找键（去除首尾空白并转小写）"""
+        return voice.strip().lower()
+
     @classmethod
-    def resolve_voice_alias(
-        cls,
-        voice: Optional[str],
-        alias_map: dict,
-        default: str,
-        prefix: str = ""
-    ) -> str:
+    def build_voice_alias_table(cls, alias_map: dict) -> Dict[str, str]:
         """
-        解析音色别名
+        构建规范化的音色查找表
+
+        同时收录别名和内部音色ID本身，解析时只需一次字典查找
 
         Args:
-            voice: 用户指定的音色
             alias_map: 别名映射表
-            default: 默认音色
-            prefix: 内部音色ID前缀（如 "lucy-voice-"）
 
         Returns:
-            解析后的音色ID
+            规范化键 -> 内部音色ID 的字典
         """
-        if not voice:
-            voice = default
-
-        # 如果已经是内部ID格式，直接返回
-        if prefix and voice.startswith(prefix):
-            return voice
-
-        # 尝试从别名映射查找
-        if voice in alias_map:
-            return alias_map[voice]
-
-        # 尝试使用默认值的别名
-        if default in alias_map:
-            return alias_map[default]
-
-        return default
+        table: Dict[str, str] = {}
+        for voice_id in alias_map.values():
+            table[cls.normalize_voice_key(voice_id)] = voice_id
+        for alias, voice_id in alias_map.items():
+            table[cls.normalize_voice_key(alias)] = voice_id
+        return table
 
     @classmethod
     def split_sentences(cls, text: str, min_length: int = 2) -> List[str]: